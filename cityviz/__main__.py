@@ -1,107 +1,102 @@
+import argparse
 import os
 import sys
-from dataclasses import dataclass
 from pathlib import Path
+from typing import List, Optional
+
+# Keep stdout clean for `python -m cityviz run -o -`
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
 
 import pygame
-import pygame_gui
 from .asset_loader import FontAssetConfig, FontAssetLoader, ImageAssetConfig, ImageAssetLoader
-from .mode import CHANGE_MODE_EVENT, GameMode, Mode, MainMenuMode
-from .utils import draw_text
-
-
-@dataclass
-class GameConfig:
-    width: int = 900
-    height: int = 500
-    fps: int = 60
-    show_debug: bool = False
-
-
-class Game:
-    """Game instance for CityViz"""
-
-    def __init__(
-            self,
-            config: GameConfig,
-            image_loader: 'ImageAssetLoader',
-            font_loader: 'FontAssetLoader'
-    ) -> None:
-        self.config = config
-        self.display = pygame.Surface((config.width, config.height))
-        self.window = pygame.display.set_mode((config.width, config.height))
-        pygame.display.set_caption("CityViz")
-        self.image_loader = image_loader
-        self.image_loader.load()
-        self.font_loader = font_loader
-        self.font_loader.load()
-        self.clock = pygame.time.Clock()
-        self.running = False
-        self.font = self.font_loader["fredoka"]
-        self.ui_manager = pygame_gui.UIManager((config.width, config.height))
-        self.active_mode: 'Mode' = MainMenuMode(
-            self.ui_manager, (self.config.width, self.config.height))
-
-    def update(self, delta_time: float) -> None:
-        """Update the active mode"""
-        self.ui_manager.update(delta_time)
-        self.active_mode.update(delta_time)
-
-    def draw(self) -> None:
-        """Draw the active game mode"""
-        self.active_mode.draw(self.display, self.image_loader)
-        if self.config.show_debug:
-            self.draw_debug()
-        self.window.blit(self.display, (0, 0))
-        pygame.display.update()
-
-    def run(self) -> None:
-        self.running = True
-        while self.running:
-            time_delta = self.clock.tick(self.config.fps) / 1000.0
-            self.handle_events()
-            self.update(time_delta)
-            self.draw()
-        pygame.quit()
-
-    def draw_debug(self) -> None:
-        draw_text(
-            self.display,
-            f"Mode: {self.active_mode.mode_name}, FPS: {round(self.clock.get_fps())}",
-            self.config.width - 150,
-            10,
-            pygame.font.Font(self.font, 18))
-
-    def handle_events(self):
-        """Active mode handles PyGame events"""
-        for event in pygame.event.get():
-            self.ui_manager.process_events(event)
-
-            if event.type == pygame.QUIT:
-                self.quit()
-
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    self.running = False
-                    continue
-
-            if event.type == CHANGE_MODE_EVENT:
-                if event.mode == "game":
-                    self.active_mode.deactivate()
-                    self.active_mode = \
-                        GameMode(self.ui_manager,
-                                 (self.config.width, self.config.height))
-
-            self.active_mode.handle_event(event)
-
-    def quit(self) -> None:
-        self.running = False
-        self.active_mode.deactivate()
-
-
-
-def main():
+from .headless import run_headless, serve_simulation
+from .metrics import MetricsWriter
+from .remote import DEFAULT_PORT, SimServer
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="cityviz",
+        description="Visualizer and inspection tool for Talk of the Town")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser(
+        "run",
+        help="step the simulation without a display, streaming per-step metrics as JSON lines")
+    run_parser.add_argument(
+        "-n", "--steps", type=int, default=None, help="number of steps to run")
+    run_parser.add_argument(
+        "-t", "--time-limit", type=float, default=None, help="stop after this many seconds")
+    run_parser.add_argument(
+        "-o", "--output", default="-", help="metrics file (default: stdout)")
+    run_parser.add_argument(
+        "--buffer-lines", type=int, default=1000, help="metric lines buffered between writes")
+    run_parser.add_argument(
+        "--city", default="Squaresville", help="name of the generated city")
+
+    serve_parser = subparsers.add_parser(
+        "serve",
+        help="run the simulation without a display and publish it to remote viewers")
+    serve_parser.add_argument(
+        "--host", default="127.0.0.1", help="address to listen on")
+    serve_parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help="port to listen on")
+    serve_parser.add_argument(
+        "--steps-per-second", type=float, default=10.0, help="simulation pace (0 for unpaced)")
+    serve_parser.add_argument(
+        "-n", "--steps", type=int, default=None, help="stop after this many steps")
+    serve_parser.add_argument(
+        "--city", default="Squaresville", help="name of the generated city")
+
+    view_parser = subparsers.add_parser(
+        "view", help="show a city published by `cityviz serve`")
+    view_parser.add_argument(
+        "--host", default="127.0.0.1", help="address of the simulation server")
+    view_parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help="port of the simulation server")
+
+    args = parser.parse_args(argv)
+    if args.command == "run" and args.steps is None and args.time_limit is None:
+        run_parser.error("one of --steps or --time-limit is required")
+    return args
+
+
+def run(args: argparse.Namespace) -> None:
+    """Run the simulation headless (no display is initialized)"""
+    if args.output == "-":
+        with MetricsWriter(sys.stdout, args.buffer_lines) as writer:
+            run_headless(writer, args.steps, args.time_limit, args.city)
+        return
+
+    with open(args.output, "w", buffering=1024 * 1024) as output:
+        with MetricsWriter(output, args.buffer_lines) as writer:
+            run_headless(writer, args.steps, args.time_limit, args.city)
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the simulation headless for remote viewers"""
+    server = SimServer(args.host, args.port)
+    try:
+        serve_simulation(server, args.steps_per_second, args.steps, args.city)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+def main(argv: Optional[List[str]] = None):
     """main function"""
+    args = parse_args(argv)
+    if args.command == "run":
+        run(args)
+        return
+    if args.command == "serve":
+        serve(args)
+        return
+
+    # The game modules are only needed (and only imported) when there is a display
+    from .game import Game, GameConfig
+
     pygame.init()
     pygame.mixer.init()
 
@@ -152,7 +147,9 @@ def main():
     ])
 
     game = Game(
-        config=GameConfig(1024, 768, 60, show_debug=True),
+        config=GameConfig(
+            1024, 768, 60, show_debug=True, adaptive_resolution=True,
+            remote_address=(args.host, args.port) if args.command == "view" else None),
         image_loader=image_asset_loader,
         font_loader=font_loader)
 
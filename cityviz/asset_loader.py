@@ -1,8 +1,21 @@
-from typing import Dict, Tuple, List
+from typing import Dict, Tuple, List, Optional
 from dataclasses import dataclass
 import pygame
 from pygame.surface import Surface
 
+from cityviz.surface_registry import PRIORITY_LOW, SurfaceCache, SurfaceRegistry, default_registry
+
+
+def scale_surface(surface: 'Surface', scale: float) -> 'Surface':
+    """Resize a surface by the given factor, keeping its color key"""
+    width, height = surface.get_size()
+    scaled = pygame.transform.smoothscale(
+        surface, (max(1, round(width * scale)), max(1, round(height * scale))))
+    color_key = surface.get_colorkey()
+    if color_key:
+        scaled.set_colorkey(color_key)
+    return scaled
+
 
 @dataclass
 class ImageAssetConfig:
@@ -13,21 +26,40 @@ class ImageAssetConfig:
 
 class ImageAssetLoader:
 
-    def __init__(self, assets: 'List[ImageAssetConfig]') -> None:
+    def __init__(
+            self,
+            assets: 'List[ImageAssetConfig]',
+            registry: Optional[SurfaceRegistry] = None
+    ) -> None:
         self._asset_configs: 'List[ImageAssetConfig]' = assets
         self._asset_dict: Dict[str, 'Surface'] = {}
+        self.registry = registry if registry is not None else default_registry
+        self._scaled_cache = SurfaceCache(self.registry, "assets", "scaled images", PRIORITY_LOW)
 
     def __getitem__(self, name: str) -> 'Surface':
         return self._asset_dict[name]
 
+    def get_scaled(self, name: str, scale: float) -> 'Surface':
+        """Return the named image resized by the given factor (cached)"""
+        if scale == 1.0:
+            return self._asset_dict[name]
+        key = (name, scale)
+        surface = self._scaled_cache.get(key)
+        if surface is None:
+            surface = self._scaled_cache.put(key, scale_surface(self._asset_dict[name], scale))
+        return surface
+
     def load(self) -> None:
+        for surface in self._asset_dict.values():
+            self.registry.untrack(surface)
         for entry in self._asset_configs:
             surface: 'Surface' = pygame.image.load(entry.path).convert_alpha()
 
             if entry.color_key:
                 surface.set_colorkey(entry.color_key)
 
-            self._asset_dict[entry.name] = surface
+            self._asset_dict[entry.name] = self.registry.track("assets", "images", surface)
+        self._scaled_cache.clear()
 
 
 @dataclass
@@ -8,6 +8,9 @@ class Camera:
         self.height = height
         self.scroll = pg_math.Vector2(0, 0)
         self.speed = speed
+        # True if the last update scrolled the camera
+        self.moved = False
 
     def update(self, delta: pg_math.Vector2) -> None:
+        self.moved = delta.x != 0 or delta.y != 0
         self.scroll += (delta * self.speed)
@@ -9,3 +9,34 @@ COLOR_BLACK = (0, 0, 0)
 COLOR_RED = (255, 0, 0)
 COLOR_GREEN = (0, 255, 0)
 COLOR_BLUE = (0, 0, 255)
+
+# DYNAMIC RESOLUTION
+# Render scales of the world layers, from highest to lowest. Tile render
+# positions are multiples of TILE_SIZE / 2, so these keep tiles pixel aligned
+RENDER_SCALES = (1.0, 0.75, 0.5)
+
+# IDLE RENDERING
+# Seconds to keep redrawing after input so UI hover/press states settle
+UI_SETTLE_TIME = 0.5
+# Longest time the game loop sleeps waiting for events while idle
+IDLE_WAIT_MS = 250
+
+# FAST-FORWARD
+# Number of simulation steps run by the fast-forward command
+FAST_FORWARD_STEPS = 365
+# Milliseconds spent stepping per frame before yielding back to
+# the game loop (keeps the window responsive while fast-forwarding)
+FAST_FORWARD_FRAME_BUDGET_MS = 10
+
+# WALKERS
+# Upper bound on animated character sprites
+MAX_WALKERS = 2000
+# Walker speed in tiles per second
+WALKER_SPEED = 1.5
+# Number of shortest paths kept by the road network
+PATH_CACHE_SIZE = 4096
+
+# MEMORY
+# Budget (MB) for the pixel data of all surfaces. Cached surfaces are
+# evicted (lowest priority first) to stay within it
+SURFACE_BUDGET_MB = 256
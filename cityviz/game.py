@@ -0,0 +1,216 @@
+import os
+import time
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import pygame
+import pygame_gui
+from cityviz.asset_loader import FontAssetLoader, ImageAssetLoader
+from cityviz.constants import IDLE_WAIT_MS, RENDER_SCALES, SURFACE_BUDGET_MB, UI_SETTLE_TIME
+from cityviz.mode import CHANGE_MODE_EVENT, GameMode, Mode, MainMenuMode, ViewerMode
+from cityviz.profiling import StepProfiler
+from cityviz.resolution import ResolutionScaler
+from cityviz.surface_registry import PRIORITY_HIGH, SurfaceCache, default_registry
+from cityviz.utils import draw_text
+
+
+@dataclass
+class GameConfig:
+    width: int = 900
+    height: int = 500
+    fps: int = 60
+    show_debug: bool = False
+    # Lower the world render resolution when frames go over budget
+    adaptive_resolution: bool = False
+    # Profile the first simulation steps (can also be toggled with P)
+    profile_on_start: bool = False
+    # Number of simulation steps captured per profile
+    profile_steps: int = 100
+    # Directory that step profiles and surface memory dumps are written to
+    profile_report_dir: str = "profiles"
+    # Budget (MB) for the memory of all surfaces (None for no limit)
+    surface_budget_mb: Optional[float] = SURFACE_BUDGET_MB
+    # Show the city published by a simulation server instead of running one
+    remote_address: Optional[Tuple[str, int]] = None
+
+
+class Game:
+    """Game instance for CityViz"""
+
+    def __init__(
+            self,
+            config: GameConfig,
+            image_loader: 'ImageAssetLoader',
+            font_loader: 'FontAssetLoader'
+    ) -> None:
+        self.config = config
+        # The registry is shared, so every game sets (or lifts) the budget itself
+        default_registry.budget_bytes = \
+            round(config.surface_budget_mb * 2 ** 20) if config.surface_budget_mb is not None else None
+        self.display = default_registry.track(
+            "game", "display", pygame.Surface((config.width, config.height)))
+        # Reduced resolution surfaces for the world layers, keyed by scale
+        self._scaled_displays = SurfaceCache(default_registry, "game", "scaled display", PRIORITY_HIGH)
+        self.resolution_scaler: Optional[ResolutionScaler] = None
+        if config.adaptive_resolution:
+            self.resolution_scaler = ResolutionScaler(1.0 / config.fps, RENDER_SCALES)
+        self.window = default_registry.track(
+            "game", "window", pygame.display.set_mode((config.width, config.height)))
+        pygame.display.set_caption("CityViz")
+        self.image_loader = image_loader
+        self.image_loader.load()
+        self.font_loader = font_loader
+        self.font_loader.load()
+        self.clock = pygame.time.Clock()
+        self.running = False
+        self.profiler = StepProfiler(config.profile_steps, config.profile_report_dir)
+        if config.profile_on_start:
+            self.profiler.start()
+        self._last_input_time = 0.0
+        self.font = self.font_loader["fredoka"]
+        self.ui_manager = pygame_gui.UIManager((config.width, config.height))
+        self.active_mode: 'Mode' = MainMenuMode(
+            self.ui_manager, (self.config.width, self.config.height))
+
+    def update(self, delta_time: float) -> None:
+        """Update the active mode"""
+        self.ui_manager.update(delta_time)
+        self.active_mode.update(delta_time)
+
+    def draw(self) -> None:
+        """Draw the active game mode"""
+        world_surface = self._world_surface()
+        world_start = time.perf_counter()
+        self.active_mode.draw(world_surface, self.image_loader)
+        if world_surface is not self.display:
+            pygame.transform.scale(world_surface, self.display.get_size(), self.display)
+        if self.resolution_scaler is not None and not self.active_mode.busy:
+            # Only the world layers get cheaper at a lower scale, so the
+            # simulation step and UI are left out of the measurement
+            self.resolution_scaler.record(time.perf_counter() - world_start)
+        # Overlays and the UI always stay at native resolution so that text stays crisp
+        self.active_mode.draw_overlay(self.display)
+        self.ui_manager.draw_ui(self.display)
+        if self.config.show_debug:
+            self.draw_debug()
+        self.window.blit(self.display, (0, 0))
+        pygame.display.update()
+
+    def run(self) -> None:
+        self.running = True
+        while self.running:
+            if self.needs_redraw():
+                # Busy modes (e.g. fast-forwarding) budget their own frame time
+                fps_cap = 0 if self.active_mode.busy else self.config.fps
+                time_delta = self.clock.tick(fps_cap) / 1000.0
+                events = pygame.event.get()
+            else:
+                # Nothing on screen is changing, so sleep until there is input
+                events = self._wait_for_events()
+                self.clock.tick()
+                # Time spent asleep is not simulated
+                time_delta = 1.0 / self.config.fps
+
+            self.handle_events(events)
+            self.update(time_delta)
+            if self.needs_redraw():
+                self.draw()
+                self.active_mode.dirty = False
+        default_registry.release("game")
+        pygame.quit()
+
+    def needs_redraw(self) -> bool:
+        """True if the next frame may look different from the last one drawn"""
+        return (self.active_mode.dirty
+                or self.active_mode.animating
+                or time.perf_counter() - self._last_input_time < UI_SETTLE_TIME)
+
+    @staticmethod
+    def _wait_for_events() -> List[pygame.event.Event]:
+        event = pygame.event.wait(IDLE_WAIT_MS)
+        if event.type == pygame.NOEVENT:
+            return []
+        return [event, *pygame.event.get()]
+
+    def _world_surface(self) -> pygame.Surface:
+        """Surface the world layers are drawn to at the current render scale"""
+        if self.resolution_scaler is None:
+            return self.display
+        scale = self.resolution_scaler.scale
+        if scale == 1.0:
+            return self.display
+        surface = self._scaled_displays.get(scale)
+        if surface is None:
+            surface = self._scaled_displays.put(scale, pygame.Surface(
+                (round(self.config.width * scale), round(self.config.height * scale))))
+        return surface
+
+    def draw_debug(self) -> None:
+        font = pygame.font.Font(self.font, 18)
+        draw_text(
+            self.display,
+            f"Mode: {self.active_mode.mode_name}, FPS: {round(self.clock.get_fps())}",
+            self.config.width - 150,
+            10,
+            font)
+        if self.resolution_scaler is not None:
+            draw_text(
+                self.display,
+                f"Render scale: {round(self.resolution_scaler.scale * 100)}%",
+                self.config.width - 150,
+                30,
+                font)
+        draw_text(
+            self.display,
+            default_registry.summary(),
+            self.config.width - 150,
+            50,
+            font)
+
+    def dump_surface_memory(self) -> str:
+        """Write the surface memory accounting to a JSON file, returning its path"""
+        os.makedirs(self.config.profile_report_dir, exist_ok=True)
+        path = os.path.join(
+            self.config.profile_report_dir, f"surfaces_{time.strftime('%Y%m%d-%H%M%S')}.json")
+        default_registry.write_dump(path)
+        print(f"Wrote surface memory dump to {path}")
+        return path
+
+    def handle_events(self, events: List[pygame.event.Event]) -> None:
+        """Active mode handles PyGame events"""
+        if events:
+            # Any input may change the UI (hover, focus, pressed buttons)
+            self._last_input_time = time.perf_counter()
+
+        for event in events:
+            self.ui_manager.process_events(event)
+
+            if event.type == pygame.QUIT:
+                self.quit()
+
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    self.running = False
+                    continue
+                if event.key == pygame.K_F12:
+                    self.dump_surface_memory()
+
+            if event.type == CHANGE_MODE_EVENT:
+                if event.mode == "game":
+                    self.active_mode.deactivate()
+                    if self.config.remote_address is not None:
+                        self.active_mode = \
+                            ViewerMode(self.ui_manager,
+                                       (self.config.width, self.config.height),
+                                       self.config.remote_address)
+                    else:
+                        self.active_mode = \
+                            GameMode(self.ui_manager,
+                                     (self.config.width, self.config.height),
+                                     self.profiler)
+
+            self.active_mode.handle_event(event)
+
+    def quit(self) -> None:
+        self.running = False
+        self.active_mode.deactivate()
@@ -0,0 +1,91 @@
+import sys
+import time
+from typing import Optional
+
+from cityviz.metrics import MetricsWriter, memory_usage_mb
+from cityviz.remote import SimServer
+from cityviz.simulation import create_simulation, entity_counts, snapshot_world
+
+
+def run_headless(
+        writer: MetricsWriter,
+        steps: Optional[int] = None,
+        time_limit: Optional[float] = None,
+        city_name: str = "Squaresville"
+) -> int:
+    """Step a simulation as fast as possible without a display
+
+    Runs until the given number of steps have run or time_limit seconds
+    have passed, whichever comes first. One metrics record is written
+    per step.
+
+    Returns:
+        int - number of steps run
+    """
+    if steps is None and time_limit is None:
+        raise ValueError("run_headless needs a step count or a time limit")
+
+    sim = create_simulation(city_name)
+    start = time.perf_counter()
+    deadline = start + time_limit if time_limit is not None else float("inf")
+    step = 0
+    while (steps is None or step < steps) and time.perf_counter() < deadline:
+        step_start = time.perf_counter()
+        sim.step()
+        step_end = time.perf_counter()
+        step += 1
+
+        record = {
+            "step": step,
+            "elapsed_s": round(step_end - start, 6),
+            "step_ms": round((step_end - step_start) * 1000, 4),
+            "rss_mb": memory_usage_mb(),
+        }
+        record.update(entity_counts(sim))
+        writer.write(record)
+
+    writer.flush()
+    elapsed = time.perf_counter() - start
+    print(f"Ran {step} steps in {elapsed:.2f}s ({step / elapsed if elapsed > 0 else 0:.1f} steps/s)",
+          file=sys.stderr)
+    return step
+
+
+def serve_simulation(
+        server: SimServer,
+        steps_per_second: float = 10.0,
+        steps: Optional[int] = None,
+        city_name: str = "Squaresville"
+) -> int:
+    """Step a simulation and publish the world to remote viewers after every step
+
+    Steps are paced to steps_per_second (0 runs unpaced). Runs until
+    the given number of steps have run, or forever.
+
+    Returns:
+        int - number of steps run
+    """
+    sim = create_simulation(city_name)
+    server.publish(snapshot_world(sim))
+    host, port = server.address
+    print(f"Serving {city_name} on {host}:{port}", file=sys.stderr)
+
+    interval = 1.0 / steps_per_second if steps_per_second > 0 else 0.0
+    next_step = time.perf_counter()
+    step = 0
+    while steps is None or step < steps:
+        sim.step()
+        server.publish(snapshot_world(sim))
+        step += 1
+
+        next_step += interval
+        delay = next_step - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        else:
+            # Running behind, so don't try to catch up with a burst of steps
+            next_step = time.perf_counter()
+
+    print(f"Served {step} steps to {server.viewer_count} viewers ({server.bytes_sent / 1024:.0f} KiB sent)",
+          file=sys.stderr)
+    return step
@@ -0,0 +1,67 @@
+import json
+import sys
+from typing import Any, Dict, List, Optional, TextIO
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore
+
+
+def memory_usage_mb() -> Optional[float]:
+    """Resident set size of this process in megabytes
+
+    Reads /proc on Linux. Elsewhere this falls back to the peak
+    resident size reported by getrusage.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+        return resident_pages * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        pass
+    if resource is None:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux/BSD
+    return max_rss / (1024 * 1024) if sys.platform == "darwin" else max_rss / 1024
+
+
+_PAGE_SIZE = resource.getpagesize() if resource is not None else 4096
+
+
+class MetricsWriter:
+    """
+    Writes metric records to a stream as JSON lines
+
+    Lines are buffered in memory and written in chunks of buffer_lines
+    so that writing metrics never dominates the time being measured.
+    """
+
+    __slots__ = 'stream', 'buffer_lines', 'records_written', '_buffer', '_encode'
+
+    def __init__(self, stream: TextIO, buffer_lines: int = 1000) -> None:
+        self.stream = stream
+        self.buffer_lines = buffer_lines
+        self.records_written = 0
+        self._buffer: List[str] = []
+        self._encode = json.JSONEncoder(separators=(",", ":")).encode
+
+    def __enter__(self) -> 'MetricsWriter':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.flush()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        self._buffer.append(self._encode(record))
+        if len(self._buffer) >= self.buffer_lines:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._buffer:
+            self._buffer.append("")
+            self.stream.write("\n".join(self._buffer))
+            self.records_written += len(self._buffer) - 1
+            self._buffer.clear()
+        self.stream.flush()
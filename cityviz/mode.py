@@ -1,23 +1,45 @@
+import time
 from abc import ABC, abstractmethod
-from typing import Tuple, Optional, Dict
+from typing import Tuple, Optional, Dict, Iterator, List, Set
 import pygame
 import pygame_gui
 from pygame_gui.elements import UIPanel, UILabel, UIButton
-from talktown.city.city import CityFactory
-from talktown.city.layout import RoadType
-from talktown.defaults.city_generation.legacy_layout import LegacyLayoutFactory
-from talktown.defaults.plugins.sample_theme import SAMPLE_THEME_PLUGIN
-from talktown.place import Building
-from talktown.simulation.simulation import Simulation
-from asset_loader import ImageAssetLoader
-
-from camera import Camera
-from constants import SKY_BLUE, TILE_SIZE
-from utils import grid_to_world, mouse_to_grid
+from cityviz.asset_loader import ImageAssetLoader, scale_surface
+
+from cityviz.camera import Camera
+from cityviz.constants import (COLOR_WHITE, FAST_FORWARD_FRAME_BUDGET_MS,
+                               FAST_FORWARD_STEPS, MAX_WALKERS, PATH_CACHE_SIZE,
+                               SKY_BLUE, TILE_SIZE, WALKER_SPEED)
+from cityviz.render_queue import (LAYER_BUILDING, LAYER_GROUND, LAYER_ROAD,
+                                  OVERLAY_DEPTH, RenderQueue, iso_depth)
+from cityviz.roads import RoadNetwork
+from cityviz.profiling import StepProfiler
+from cityviz.remote import RemoteWorldClient
+from cityviz.simulation import create_simulation, snapshot_world
+from cityviz.surface_registry import PRIORITY_LOW, SurfaceCache, default_registry
+from cityviz.utils import draw_text, grid_to_world, mouse_to_grid, tiles_in_bounds
+from cityviz.walkers import WalkerRenderer
+from cityviz.world_state import WorldState, apply_delta, diff_states
 
 
 CHANGE_MODE_EVENT = pygame.event.custom_type()
 
+HOVER_OUTLINE_WIDTH = 3
+
+# Image asset drawn for each talktown RoadType name (defaults to "road_ns")
+ROAD_TILE_IMAGES = {
+    "FOUR_WAY": "road_4way",
+    "STRAIGHT_EW": "road_ew",
+    "THREE_WAY_E": "road_3way_NES",
+    "THREE_WAY_S": "road_3way_ESW",
+    "THREE_WAY_W": "road_3way_NSW",
+    "THREE_WAY_N": "road_3way_NEW",
+    "CURVE_ES": "road_curve_ES",
+    "CURVE_NE": "road_curve_NE",
+    "CURVE_NW": "road_curve_NW",
+    "CURVE_SW": "road_curve_SW",
+}
+
 
 class Mode(ABC):
     """Handles events and drawing to the screen when active"""
@@ -30,6 +52,8 @@ class Mode(ABC):
         self.active = False
         self.ui_manager = ui_manager
         self.screen_size = screen_size
+        # Set when something visible changed since the last draw
+        self.dirty = True
 
     @abstractmethod
     def update(self, delta_time: float) -> None:
@@ -43,11 +67,29 @@ class Mode(ABC):
 
     @abstractmethod
     def draw(self, display: 'pygame.Surface', image_loader: ImageAssetLoader) -> None:
-        """Draw to the screen while active"""
+        """Draw to the screen while active
+
+        The display may be smaller than screen_size when the game renders
+        at a reduced resolution. The UI is drawn separately by the game.
+        """
         raise NotImplementedError()
 
+    def draw_overlay(self, display: 'pygame.Surface') -> None:
+        """Draw text over the world at native resolution (after it is scaled up)"""
+
+    @property
+    def busy(self) -> bool:
+        """True while the mode has work that should not wait on the frame cap"""
+        return False
+
+    @property
+    def animating(self) -> bool:
+        """True while the mode changes what is on screen without any new input"""
+        return self.busy
+
     def deactivate(self):
         self.ui_manager.clear_and_reset()
+        default_registry.release(self.mode_name)
 
 
 class MainMenuMode(Mode):
@@ -58,7 +100,8 @@ class MainMenuMode(Mode):
     def __init__(self, ui_manager: 'pygame_gui.UIManager', screen_size: Tuple[int, int]) -> None:
         super().__init__(ui_manager, screen_size)
         self.options = ['New City', 'Load City', 'Quit']
-        self.background = pygame.Surface(screen_size)
+        self.background = default_registry.track(
+            self.mode_name, "background", pygame.Surface(screen_size))
         self.background.fill(SKY_BLUE)
 
         # Create center panel
@@ -137,25 +180,296 @@ class MainMenuMode(Mode):
     def draw(self, display: 'pygame.Surface', image_loader: ImageAssetLoader) -> None:
         """Draw to the screen while active"""
         display.blit(self.background, (0, 0))
-        self.ui_manager.draw_ui(display)
 
 
-class GameMode(Mode):
-    """Mode active when playing the game"""
+class CityViewMode(Mode):
+    """Base for modes that draw a city map that the camera can scroll around"""
 
-    mode_name = 'Game'
+    mode_name = 'City View'
 
     def __init__(self, ui_manager: 'pygame_gui.UIManager', screen_size: Tuple[int, int]) -> None:
         super().__init__(ui_manager, screen_size)
         self.camera = Camera(screen_size[0], screen_size[1], 10)
-        self.background = pygame.Surface(screen_size)
+        self.background = default_registry.track(
+            self.mode_name, "background", pygame.Surface(screen_size))
         self.background.fill(SKY_BLUE)
-        self.sim = Simulation(
-            SAMPLE_THEME_PLUGIN,
-            "Squaresville",
-            CityFactory(LegacyLayoutFactory()))
-        self.sim_running = False
+        self.render_queue = RenderQueue()
+        self.hover_outline = default_registry.track(
+            self.mode_name, "overlay", self._create_hover_outline())
+        self._scaled_hover_outlines = SurfaceCache(
+            default_registry, self.mode_name, "overlay", PRIORITY_LOW)
+        self.road_network = RoadNetwork(PATH_CACHE_SIZE)
+        self.walkers = WalkerRenderer(self.road_network, WALKER_SPEED, owner=self.mode_name)
+        # Last applied state of the city (a copy owned by the mode)
+        self._world_state: Optional[WorldState] = None
+        # Image drawn on each tile with a road or building, and every
+        # image used (possibly including some that are no longer on the map)
+        self._layout_shape: Tuple[int, int] = (0, 0)
+        self._road_tiles: Dict[Tuple[int, int], str] = {}
+        self._building_tiles: Dict[Tuple[int, int], str] = {}
+        self._road_images: Set[str] = set()
+        self._building_images: Set[str] = set()
         self.selected_tile: Optional[pygame.math.Vector2] = None
+        self.overlay_font = pygame.font.Font(None, 28)
+        self.summary_font = pygame.font.Font(None, 20)
+        self.button_down = {
+            "left": False,
+            "right": False,
+            "up": False,
+            "down": False
+        }
+
+    def handle_event(self, event: pygame.event.Event) -> None:
+        """Handle PyGame events while active"""
+        mouse_screen_x, mouse_screen_y = pygame.mouse.get_pos()
+        mouse_grid_x, mouse_grid_y = mouse_to_grid(
+            mouse_screen_x, mouse_screen_y, self.camera.scroll)
+        if self._is_mouse_in_bounds(mouse_grid_x, mouse_grid_y):
+            selected_tile = pygame.math.Vector2(
+                mouse_grid_x, mouse_grid_y)
+        else:
+            selected_tile = None
+        if selected_tile != self.selected_tile:
+            self.selected_tile = selected_tile
+            self.dirty = True
+
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_w:
+                self.button_down["up"] = True
+            if event.key == pygame.K_a:
+                self.button_down["left"] = True
+            if event.key == pygame.K_s:
+                self.button_down["down"] = True
+            if event.key == pygame.K_d:
+                self.button_down["right"] = True
+
+        if event.type == pygame.KEYUP:
+            if event.key == pygame.K_w:
+                self.button_down["up"] = False
+            if event.key == pygame.K_a:
+                self.button_down["left"] = False
+            if event.key == pygame.K_s:
+                self.button_down["down"] = False
+            if event.key == pygame.K_d:
+                self.button_down["right"] = False
+
+    def update(self, delta_time: float) -> None:
+        """Update the state of the mode"""
+        camera_delta = pygame.Vector2(0, 0)
+        if self.button_down["up"]:
+            camera_delta += pygame.Vector2(0, 1)
+        if self.button_down["left"]:
+            camera_delta += pygame.Vector2(1, 0)
+        if self.button_down["down"]:
+            camera_delta += pygame.Vector2(0, -1)
+        if self.button_down["right"]:
+            camera_delta += pygame.Vector2(-1, 0)
+        self.camera.update(camera_delta)
+        if self.camera.moved:
+            self.dirty = True
+
+    def draw(self, display: 'pygame.Surface', image_loader: ImageAssetLoader) -> None:
+        """Draw to the screen while active"""
+        display.blit(self.background, (0, 0))
+        self._draw_map(display, image_loader)
+
+    @property
+    def animating(self) -> bool:
+        return any(self.button_down.values())
+
+    def _draw_map(self, display: 'pygame.Surface', image_loader: ImageAssetLoader) -> None:
+        view_size = display.get_size()
+        scale = view_size[0] / self.screen_size[0]
+        self._queue_ground(image_loader, view_size, scale)
+        self._queue_roads(image_loader, view_size, scale)
+        self._queue_buildings(image_loader, view_size, scale)
+        self.walkers.submit(self.render_queue, self.camera.scroll, view_size, scale)
+        self._queue_hover_tile(scale)
+        self.render_queue.flush(display)
+
+    def _draw_summary(self, display: pygame.Surface, lines: List[str]) -> None:
+        """Draw lines of text in the bottom-left corner"""
+        line_height = self.summary_font.get_linesize()
+        y = display.get_height() - 10 - line_height * len(lines)
+        for line in lines:
+            display.blit(self.summary_font.render(line, True, COLOR_WHITE), (10, y))
+            y += line_height
+
+    def _apply_world_state(self, state: WorldState) -> None:
+        """Refresh cached tile data, the road graph and walkers after the city changed
+
+        Only the changes since the last applied state are applied, so an
+        unchanged city costs time in the number of roads and buildings.
+        """
+        delta = diff_states(self._world_state, state) if self._world_state is not None else None
+        if delta == {}:
+            return
+
+        if delta is None:
+            # First state, or the map changed size
+            self._world_state = state.copy()
+            self._layout_shape = state.shape
+            self._road_tiles = {
+                position: ROAD_TILE_IMAGES.get(road_type, "road_ns")
+                for position, road_type in state.roads.items()
+            }
+            # Kept up to date by apply_delta()
+            self._building_tiles = self._world_state.buildings
+            self._road_images = set(self._road_tiles.values())
+            self._building_images = set(self._building_tiles.values())
+        else:
+            apply_delta(self._world_state, delta)
+            for x, y, road_type in delta.get("roads", ()):
+                if road_type is None:
+                    del self._road_tiles[x, y]
+                else:
+                    image_tile_name = ROAD_TILE_IMAGES.get(road_type, "road_ns")
+                    self._road_tiles[x, y] = image_tile_name
+                    self._road_images.add(image_tile_name)
+            self._building_images.update(
+                style for _, _, style in delta.get("buildings", ()) if style is not None)
+
+        if delta is None or "roads" in delta:
+            self.road_network.sync(state.shape, self._road_tiles.keys())
+        self.walkers.set_population(min(state.population, MAX_WALKERS))
+        self.dirty = True
+
+    def _is_mouse_in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self._layout_shape[0] \
+            and 0 <= y < self._layout_shape[1]
+
+    def _reset_buttons(self) -> None:
+        self.button_down["up"] = False
+        self.button_down["left"] = False
+        self.button_down["down"] = False
+        self.button_down["right"] = False
+
+    def _scroll_offset(self, scale: float) -> Tuple[int, int]:
+        # Rounding the scroll (not every position) keeps tiles pixel aligned
+        return round(self.camera.scroll.x * scale), round(self.camera.scroll.y * scale)
+
+    def _visible_tiles(
+            self,
+            view_size: Tuple[int, int],
+            scale: float,
+            sprite_size: Tuple[int, int],
+            sprite_top: float = 0.0
+    ) -> Iterator[Tuple[int, int, int, int]]:
+        """(grid_x, grid_y, render_x, render_y) of the tiles whose sprite overlaps the view
+
+        Args:
+            sprite_size: (Tuple[int, int]) - scaled size of the (largest) sprite drawn on a tile
+            sprite_top: (float) - screen distance from the tile's render position to the sprite's top
+        """
+        offset_x, offset_y = self._scroll_offset(scale)
+        view_width, view_height = view_size
+        sprite_w, sprite_h = sprite_size
+        bounds = ((-sprite_w - offset_x) / scale,
+                  (-sprite_h - sprite_top - offset_y) / scale,
+                  (view_width - offset_x) / scale,
+                  (view_height - sprite_top - offset_y) / scale)
+        return tiles_in_bounds(bounds, self._layout_shape, TILE_SIZE)
+
+    def _queue_ground(self, image_loader: ImageAssetLoader, view_size: Tuple[int, int], scale: float) -> None:
+        sprite = image_loader.get_scaled("grass", scale)
+        offset_x, offset_y = self._scroll_offset(scale)
+        submit = self.render_queue.submit
+        for x, y, render_x, render_y in self._visible_tiles(view_size, scale, sprite.get_size()):
+            submit(sprite, (render_x * scale + offset_x, render_y * scale + offset_y),
+                   iso_depth(x, y, LAYER_GROUND))
+
+    def _queue_roads(self, image_loader: ImageAssetLoader, view_size: Tuple[int, int], scale: float) -> None:
+        if not self._road_tiles:
+            return
+        # Looked up once per image, since the scaled image cache does LRU bookkeeping
+        sprites = {name: image_loader.get_scaled(name, scale) for name in self._road_images}
+        sprite_size = (max(sprite.get_width() for sprite in sprites.values()),
+                       max(sprite.get_height() for sprite in sprites.values()))
+        offset_x, offset_y = self._scroll_offset(scale)
+        max_x, max_y = view_size
+        submit = self.render_queue.submit
+        road_tiles = self._road_tiles
+        for x, y, render_x, render_y in self._visible_tiles(view_size, scale, sprite_size):
+            image_tile_name = road_tiles.get((x, y))
+            if image_tile_name is None:
+                continue
+            sprite = sprites[image_tile_name]
+            screen_x = render_x * scale + offset_x
+            screen_y = render_y * scale + offset_y
+            if -sprite.get_width() < screen_x < max_x and -sprite.get_height() < screen_y < max_y:
+                submit(sprite, (screen_x, screen_y), iso_depth(x, y, LAYER_ROAD))
+
+    def _queue_buildings(self, image_loader: ImageAssetLoader, view_size: Tuple[int, int], scale: float) -> None:
+        if not self._building_tiles:
+            return
+        sprites = {style: image_loader.get_scaled(style, scale) for style in self._building_images}
+        sprite_size = (max(sprite.get_width() for sprite in sprites.values()),
+                       max(sprite.get_height() for sprite in sprites.values()))
+        # Buildings stand on the bottom of their tile
+        base = TILE_SIZE * scale
+        offset_x, offset_y = self._scroll_offset(scale)
+        max_x, max_y = view_size
+        submit = self.render_queue.submit
+        building_tiles = self._building_tiles
+        for x, y, render_x, render_y in self._visible_tiles(
+                view_size, scale, sprite_size, base - sprite_size[1]):
+            building_style = building_tiles.get((x, y))
+            if building_style is None:
+                continue
+            building_img = sprites[building_style]
+            screen_x = render_x * scale + offset_x
+            screen_y = render_y * scale + base + offset_y - building_img.get_height()
+            if -building_img.get_width() < screen_x < max_x \
+                    and -building_img.get_height() < screen_y < max_y:
+                submit(building_img, (screen_x, screen_y), iso_depth(x, y, LAYER_BUILDING))
+
+    def _queue_hover_tile(self, scale: float) -> None:
+        if self.selected_tile is not None:
+            render_x, render_y = grid_to_world(
+                (int(self.selected_tile.x), int(self.selected_tile.y)))["render_pos"]
+            if scale == 1.0:
+                outline = self.hover_outline
+            else:
+                outline = self._scaled_hover_outlines.get(scale)
+                if outline is None:
+                    outline = self._scaled_hover_outlines.put(
+                        scale, scale_surface(self.hover_outline, scale))
+            offset_x, offset_y = self._scroll_offset(scale)
+            # The outline surface is padded by its line width on each side
+            self.render_queue.submit(
+                outline,
+                ((render_x - HOVER_OUTLINE_WIDTH) * scale + offset_x,
+                 (render_y - HOVER_OUTLINE_WIDTH) * scale + offset_y),
+                OVERLAY_DEPTH)
+
+    @staticmethod
+    def _create_hover_outline() -> pygame.Surface:
+        tile = grid_to_world((0, 0))
+        min_x, min_y = tile["render_pos"]
+        poly = [(x - min_x + HOVER_OUTLINE_WIDTH, y - min_y + HOVER_OUTLINE_WIDTH)
+                for x, y in tile["iso_poly"]]
+        width = max(x for x, _ in poly) + HOVER_OUTLINE_WIDTH + 1
+        height = max(y for _, y in poly) + HOVER_OUTLINE_WIDTH + 1
+        outline = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.polygon(outline, COLOR_WHITE, poly, HOVER_OUTLINE_WIDTH)
+        return outline
+
+
+class GameMode(CityViewMode):
+    """Mode active when playing the game"""
+
+    mode_name = 'Game'
+
+    def __init__(
+            self,
+            ui_manager: 'pygame_gui.UIManager',
+            screen_size: Tuple[int, int],
+            profiler: Optional[StepProfiler] = None
+    ) -> None:
+        super().__init__(ui_manager, screen_size)
+        self.sim = create_simulation()
+        self.sim_running = False
+        self._sync_layout()
         self.selected_building: Optional[str] = None
         self.open_windows: Dict[str, pygame_gui.elements.UIWindow] = {}
         self.ui_elements = {
@@ -173,25 +487,21 @@ class GameMode(Mode):
                 relative_rect=pygame.Rect((200, 0), (100, 50)),
                 text='Pause',
                 manager=self.ui_manager
+            ),
+            'fast-forward-btn': pygame_gui.elements.UIButton(
+                relative_rect=pygame.Rect((300, 0), (100, 50)),
+                text='Fast Fwd',
+                manager=self.ui_manager
             )
         }
-        self.button_down = {
-            "left": False,
-            "right": False,
-            "up": False,
-            "down": False
-        }
+        self.fast_forward_total = 0
+        self.fast_forward_remaining = 0
+        self._fast_forward_start = 0.0
+        self.profiler = profiler if profiler is not None else StepProfiler()
 
     def handle_event(self, event: pygame.event.Event) -> None:
         """Handle PyGame events while active"""
-        mouse_screen_x, mouse_screen_y = pygame.mouse.get_pos()
-        mouse_grid_x, mouse_grid_y = mouse_to_grid(
-            mouse_screen_x, mouse_screen_y, self.camera.scroll)
-        if self._is_mouse_in_bounds(mouse_grid_x, mouse_grid_y):
-            self.selected_tile = pygame.math.Vector2(
-                mouse_grid_x, mouse_grid_y)
-        else:
-            self.selected_tile = None
+        super().handle_event(event)
 
         if event.type == pygame.USEREVENT:
             if event.user_type == pygame_gui.UI_WINDOW_CLOSE:
@@ -199,34 +509,25 @@ class GameMode(Mode):
                 return
             if event.user_type == pygame_gui.UI_BUTTON_PRESSED:
                 if event.ui_element == self.ui_elements['step-btn']:
-                    self.sim.step()
+                    if not self.fast_forwarding:
+                        self._step_simulation()
+                        self._sync_layout()
                 if event.ui_element == self.ui_elements['play-btn']:
                     self.sim_running = True
                 if event.ui_element == self.ui_elements['pause-btn']:
                     self.sim_running = False
+                    self.cancel_fast_forward()
                     print("Simulation Paused")
+                if event.ui_element == self.ui_elements['fast-forward-btn']:
+                    self.fast_forward(FAST_FORWARD_STEPS)
                 return
 
         if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_w:
-                self.button_down["up"] = True
-            if event.key == pygame.K_a:
-                self.button_down["left"] = True
-            if event.key == pygame.K_s:
-                self.button_down["down"] = True
-            if event.key == pygame.K_d:
-                self.button_down["right"] = True
-            return
-
-        if event.type == pygame.KEYUP:
-            if event.key == pygame.K_w:
-                self.button_down["up"] = False
-            if event.key == pygame.K_a:
-                self.button_down["left"] = False
-            if event.key == pygame.K_s:
-                self.button_down["down"] = False
-            if event.key == pygame.K_d:
-                self.button_down["right"] = False
+            if event.key == pygame.K_f:
+                self.fast_forward(FAST_FORWARD_STEPS)
+            if event.key == pygame.K_p:
+                self.profiler.toggle()
+                self.dirty = True
             return
 
         if event.type == pygame.MOUSEBUTTONDOWN:
@@ -259,101 +560,218 @@ class GameMode(Mode):
 
     def update(self, delta_time: float) -> None:
         """Update the state of the mode"""
-        camera_delta = pygame.Vector2(0, 0)
-        if self.button_down["up"]:
-            camera_delta += pygame.Vector2(0, 1)
-        if self.button_down["left"]:
-            camera_delta += pygame.Vector2(1, 0)
-        if self.button_down["down"]:
-            camera_delta += pygame.Vector2(0, -1)
-        if self.button_down["right"]:
-            camera_delta += pygame.Vector2(-1, 0)
-        self.camera.update(camera_delta)
+        super().update(delta_time)
+
+        if self.fast_forwarding:
+            self._update_fast_forward()
+            return
 
         if self.sim_running:
-            print("Stepping")
-            self.sim.step()
+            self._step_simulation()
+            self._sync_layout()
+            # Walkers only move while the simulation runs, so a
+            # paused city can be left on screen without redrawing
+            self.walkers.update(delta_time)
 
     def draw(self, display: 'pygame.Surface', image_loader: ImageAssetLoader) -> None:
         """Draw to the screen while active"""
         display.blit(self.background, (0, 0))
-        self._draw_ground(display, image_loader)
-        self._draw_roads(display, image_loader)
-        self._draw_hover_tile(display)
-        self.ui_manager.draw_ui(display)
+        # Map drawing is suspended while fast-forwarding so that the frame time goes to the sim
+        if not self.fast_forwarding:
+            self._draw_map(display, image_loader)
+
+    def draw_overlay(self, display: 'pygame.Surface') -> None:
+        """Draw text over the world at native resolution (after it is scaled up)"""
+        if self.fast_forwarding:
+            self._draw_fast_forward_progress(display)
+        self._draw_profile_summary(display)
+
+    @property
+    def busy(self) -> bool:
+        return self.fast_forwarding
+
+    @property
+    def animating(self) -> bool:
+        return self.fast_forwarding or self.sim_running or super().animating
+
+    @property
+    def fast_forwarding(self) -> bool:
+        return self.fast_forward_remaining > 0
+
+    def fast_forward(self, steps: int) -> None:
+        """Run the given number of simulation steps with map drawing suspended
+
+        Steps are run in batches during update(), each batch limited to
+        FAST_FORWARD_FRAME_BUDGET_MS so that events are still processed.
+        """
+        if steps <= 0 or self.fast_forwarding:
+            return
+        self.sim_running = False
+        self.fast_forward_total = steps
+        self.fast_forward_remaining = steps
+        self._fast_forward_start = time.perf_counter()
+        print(f"Fast-forwarding {steps} steps")
+
+    def cancel_fast_forward(self) -> None:
+        """Stop fast-forwarding, keeping the steps that have already run"""
+        if self.fast_forwarding:
+            self._finish_fast_forward()
+
+    def _step_simulation(self) -> None:
+        """Advance the simulation one step, timed (and profiled) by the step profiler"""
+        self.profiler.step(self.sim.step)
+
+    def _update_fast_forward(self) -> None:
+        step = self._step_simulation
+        deadline = time.perf_counter() + FAST_FORWARD_FRAME_BUDGET_MS / 1000.0
+        while self.fast_forward_remaining > 0:
+            step()
+            self.fast_forward_remaining -= 1
+            if time.perf_counter() >= deadline:
+                break
+
+        if self.fast_forward_remaining == 0:
+            self._finish_fast_forward()
+
+    def _finish_fast_forward(self) -> None:
+        steps_run = self.fast_forward_total - self.fast_forward_remaining
+        elapsed = time.perf_counter() - self._fast_forward_start
+        steps_per_second = steps_run / elapsed if elapsed > 0 else float(steps_run)
+        print(f"Fast-forwarded {steps_run} steps in {elapsed:.2f}s "
+              f"({steps_per_second:.1f} steps/s)")
+        self.fast_forward_total = 0
+        self.fast_forward_remaining = 0
+        self._sync_layout()
+
+    def _draw_fast_forward_progress(self, display: pygame.Surface) -> None:
+        steps_run = self.fast_forward_total - self.fast_forward_remaining
+        width, height = display.get_size()
+        bar_rect = pygame.Rect(0, 0, int(width * 0.5), 24)
+        bar_rect.center = (int(width / 2), int(height / 2))
+        fill_rect = bar_rect.copy()
+        fill_rect.width = int(bar_rect.width * steps_run / self.fast_forward_total)
+        pygame.draw.rect(display, COLOR_WHITE, fill_rect)
+        pygame.draw.rect(display, COLOR_WHITE, bar_rect, 2)
+        draw_text(
+            display,
+            f"Fast-forwarding: {steps_run}/{self.fast_forward_total} steps",
+            bar_rect.centerx,
+            bar_rect.top - 20,
+            self.overlay_font)
+
+    def _draw_profile_summary(self, display: pygame.Surface) -> None:
+        profiler = self.profiler
+        if not profiler.active and not profiler.hotspots:
+            return
 
-    def _is_mouse_in_bounds(self, x: int, y: int) -> bool:
-        return 0 <= x < self.sim.get_city().layout.shape[0] \
-            and 0 <= y < self.sim.get_city().layout.shape[1]
+        histogram = profiler.histogram
+        lines = [
+            f"Profiling: {profiler.remaining} steps left" if profiler.active
+            else "Step hotspots (P to profile again)",
+            f"Step latency: p50 <= {histogram.percentile(50):g} ms, "
+            f"p95 <= {histogram.percentile(95):g} ms ({len(histogram)} steps)",
+        ]
+        lines.extend(f"{seconds * 1000:.1f} ms  {name}" for name, seconds in profiler.hotspots)
 
-    def _reset_buttons(self) -> None:
-        self.button_down["up"] = False
-        self.button_down["left"] = False
-        self.button_down["down"] = False
-        self.button_down["right"] = False
+        self._draw_summary(display, lines)
 
-    def _draw_ground(self, display: pygame.Surface, image_loader: ImageAssetLoader) -> None:
-        # Draw the ground
-        rows, cols = self.sim.get_city().layout.shape
-        for x in range(rows):
-            for y in range(cols):
-                pos_info = grid_to_world((x, y))
-                render_pos = pos_info["render_pos"]
-                display.blit(
-                    image_loader["grass"],
-                    (render_pos[0] + self.camera.scroll.x, render_pos[1] + self.camera.scroll.y))
-
-    def _draw_roads(self, display: pygame.Surface, image_loader: ImageAssetLoader) -> None:
-        rows, cols = self.sim.get_city().layout.shape
-        for x in range(rows):
-            for y in range(cols):
-                render_pos = grid_to_world((x, y))["render_pos"]
-                road_type = self.sim.get_city().layout.road_grid[x, y]
-                if road_type != RoadType.EMPTY:
-                    image_tile_name = "road_ns"
-                    if road_type == RoadType.FOUR_WAY:
-                        image_tile_name = "road_4way"
-                    elif road_type == RoadType.STRAIGHT_EW:
-                        image_tile_name = "road_ew"
-                    elif road_type == RoadType.THREE_WAY_E:
-                        image_tile_name = "road_3way_NES"
-                    elif road_type == RoadType.THREE_WAY_S:
-                        image_tile_name = "road_3way_ESW"
-                    elif road_type == RoadType.THREE_WAY_W:
-                        image_tile_name = "road_3way_NSW"
-                    elif road_type == RoadType.THREE_WAY_N:
-                        image_tile_name = "road_3way_NEW"
-                    elif road_type == RoadType.CURVE_ES:
-                        image_tile_name = "road_curve_ES"
-                    elif road_type == RoadType.CURVE_NE:
-                        image_tile_name = "road_curve_NE"
-                    elif road_type == RoadType.CURVE_NW:
-                        image_tile_name = "road_curve_NW"
-                    elif road_type == RoadType.CURVE_SW:
-                        image_tile_name = "road_curve_SW"
-
-                    display.blit(
-                        image_loader[image_tile_name],
-                        (render_pos[0] + self.camera.scroll.x, render_pos[1] + self.camera.scroll.y))
-
-    def _draw_buildings(self, display: pygame.Surface, image_loader: ImageAssetLoader) -> None:
-        rows, cols = self.sim.get_city().layout.shape
-        for x in range(rows):
-            for y in range(cols):
-                lot = self.sim.get_city().layout.lot_grid[x, y]
-                if lot and lot.building:
-                    building_style = self.sim.world.component_for_entity(lot.building, Building).building_style
-                    building_img = image_loader[building_style]
-                    render_pos = grid_to_world((x, y))["render_pos"]
-                    display.blit(
-                        building_img,
-                        (render_pos[0] + self.camera.scroll.x,
-                         render_pos[1] + self.camera.scroll.y - building_img.get_height() + TILE_SIZE))
-
-    def _draw_hover_tile(self, display: pygame.Surface) -> None:
-        if self.selected_tile is not None:
-            poly = grid_to_world((int(self.selected_tile.x), int(
-                self.selected_tile.y)))['iso_poly']
-            poly = [(x + self.camera.scroll.x, y + self.camera.scroll.y)
-                    for x, y in poly]
-            pygame.draw.polygon(display, (255, 255, 255), poly, 3)
+    def _sync_layout(self) -> None:
+        self._apply_world_state(snapshot_world(self.sim))
+
+
+class ViewerMode(CityViewMode):
+    """Shows a city simulated by another process (see remote.SimServer)"""
+
+    mode_name = 'Viewer'
+
+    # Seconds after the last received tick during which walkers keep moving
+    LIVE_TIMEOUT = 1.0
+    # Seconds between attempts to reach the server while disconnected
+    RECONNECT_INTERVAL = 2.0
+    # Longest time (seconds) the game waits on one connection attempt
+    CONNECT_TIMEOUT = 0.5
+
+    def __init__(
+            self,
+            ui_manager: 'pygame_gui.UIManager',
+            screen_size: Tuple[int, int],
+            address: Tuple[str, int]
+    ) -> None:
+        super().__init__(ui_manager, screen_size)
+        self.address = address
+        self.client: Optional[RemoteWorldClient] = None
+        self._last_tick_time = 0.0
+        self._last_tick = 0
+        self._next_connect_time = 0.0
+        self._retrying = False
+        self._connect()
+
+    @property
+    def connected(self) -> bool:
+        return self.client is not None and self.client.connected
+
+    @property
+    def live(self) -> bool:
+        """True while the server is sending updates"""
+        return self.connected \
+            and time.perf_counter() - self._last_tick_time < self.LIVE_TIMEOUT
+
+    @property
+    def animating(self) -> bool:
+        return self.live or super().animating
+
+    def update(self, delta_time: float) -> None:
+        """Update the state of the mode"""
+        super().update(delta_time)
+        if not self.connected:
+            if time.perf_counter() >= self._next_connect_time:
+                self._connect()
+            return
+
+        if self.client.poll():
+            self._apply_world_state(self.client.state)
+        if self.client.tick != self._last_tick:
+            self._last_tick = self.client.tick
+            self._last_tick_time = time.perf_counter()
+            self.dirty = True
+        if not self.client.connected:
+            print("Lost connection to the simulation server")
+            self._next_connect_time = time.perf_counter() + self.RECONNECT_INTERVAL
+            self.dirty = True
+        if self.live:
+            self.walkers.update(delta_time)
+
+    def draw_overlay(self, display: 'pygame.Surface') -> None:
+        """Draw text over the world at native resolution (after it is scaled up)"""
+        host, port = self.address
+        if self.connected:
+            lines = [
+                f"Viewing {host}:{port}",
+                f"Tick {self.client.tick}, {self.client.bytes_received / 1024:.0f} KiB received",
+            ]
+        else:
+            lines = [f"Disconnected from {host}:{port}, retrying every {self.RECONNECT_INTERVAL:g}s"]
+        self._draw_summary(display, lines)
+
+    def deactivate(self):
+        if self.client is not None:
+            self.client.close()
+        super().deactivate()
+
+    def _connect(self) -> None:
+        if self.client is not None:
+            self.client.close()
+            self.client = None
+        self._next_connect_time = time.perf_counter() + self.RECONNECT_INTERVAL
+        try:
+            self.client = RemoteWorldClient(*self.address, timeout=self.CONNECT_TIMEOUT)
+        except OSError as error:
+            if not self._retrying:
+                print(f"Could not connect to the simulation server ({error}), retrying")
+                self._retrying = True
+                self.dirty = True
+            return
+        print(f"Connected to the simulation server at {self.address[0]}:{self.address[1]}")
+        self._retrying = False
+        self._last_tick = 0
+        self.dirty = True
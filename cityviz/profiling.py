@@ -0,0 +1,211 @@
+import bisect
+import cProfile
+import io
+import os
+import pstats
+import time
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Upper bounds (milliseconds) of the step latency histogram buckets
+LATENCY_BUCKETS_MS = (0.5, 1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024)
+
+
+class LatencyHistogram:
+    """Counts step durations in exponentially sized buckets"""
+
+    __slots__ = 'bounds', 'counts', 'total', 'max'
+
+    def __init__(self, bounds: Sequence[float] = LATENCY_BUCKETS_MS) -> None:
+        self.bounds = tuple(bounds)
+        # The last bucket holds everything over the largest bound
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.total = 0.0
+        self.max = 0.0
+
+    def __len__(self) -> int:
+        return sum(self.counts)
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000.0
+        self.counts[bisect.bisect_left(self.bounds, ms)] += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def mean(self) -> float:
+        """Mean latency in milliseconds"""
+        count = len(self)
+        return self.total / count if count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """Upper bound (ms) of the bucket containing the given percentile"""
+        count = len(self)
+        if count == 0:
+            return 0.0
+        rank = count * percent / 100.0
+        seen = 0
+        for bound, bucket_count in zip(self.bounds, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return self.max
+
+    def format(self, width: int = 40) -> List[str]:
+        """Text rendering of the histogram, one line per non-empty bucket"""
+        largest = max(self.counts) or 1
+        lines = []
+        for i, bucket_count in enumerate(self.counts):
+            if not bucket_count:
+                continue
+            lower = self.bounds[i - 1] if i > 0 else 0
+            upper = f"{self.bounds[i]:g}" if i < len(self.bounds) else "inf"
+            bar = "#" * max(1, round(bucket_count * width / largest))
+            lines.append(f"{lower:>7g} - {upper:>5} ms | {bucket_count:>6} {bar}")
+        return lines
+
+
+def _module_name(filename: str) -> Optional[str]:
+    """Dotted module name for files inside the talktown package"""
+    parts = os.path.normpath(filename).split(os.sep)
+    if "talktown" not in parts:
+        return None
+    start = len(parts) - 1 - parts[::-1].index("talktown")
+    module = ".".join(parts[start:])
+    return module[:-3] if module.endswith(".py") else module
+
+
+class StepProfiler:
+    """
+    Times every simulation step and profiles the next N steps on request
+
+    Step latency is always recorded in a histogram. While a capture is
+    active, steps run under cProfile. When the capture ends, self time
+    is aggregated per talktown module (its systems) and per function,
+    and a report is written to report_dir. The top entries are kept in
+    hotspots for the in-game summary.
+    """
+
+    def __init__(self, steps: int = 100, report_dir: str = ".", top_n: int = 5) -> None:
+        self.steps = steps
+        self.report_dir = report_dir
+        self.top_n = top_n
+        self.histogram = LatencyHistogram()
+        self.remaining = 0
+        self.hotspots: List[Tuple[str, float]] = []
+        self.last_report_path: Optional[str] = None
+        self._profile: Optional[cProfile.Profile] = None
+        self._capture_histogram = LatencyHistogram()
+        self._captured_steps = 0
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def start(self, steps: Optional[int] = None) -> None:
+        """Profile the next steps (defaults to self.steps)"""
+        if self.active:
+            return
+        self.remaining = self.steps if steps is None else steps
+        self._profile = cProfile.Profile()
+        self._capture_histogram = LatencyHistogram()
+        self._captured_steps = 0
+        print(f"Profiling the next {self.remaining} simulation steps")
+
+    def stop(self) -> Optional[str]:
+        """End the capture early and write a report of the steps profiled so far"""
+        if not self.active:
+            return None
+        return self._finish()
+
+    def toggle(self) -> None:
+        if self.active:
+            self.stop()
+        else:
+            self.start()
+
+    def step(self, step_fn: Callable[[], None]) -> float:
+        """Run one simulation step, returning its duration in seconds"""
+        profile = self._profile
+        if profile is None:
+            start = time.perf_counter()
+            step_fn()
+            elapsed = time.perf_counter() - start
+            self.histogram.record(elapsed)
+            return elapsed
+
+        start = time.perf_counter()
+        profile.enable()
+        step_fn()
+        profile.disable()
+        elapsed = time.perf_counter() - start
+
+        self.histogram.record(elapsed)
+        self._capture_histogram.record(elapsed)
+        self._captured_steps += 1
+        self.remaining -= 1
+        if self.remaining <= 0:
+            self._finish()
+        return elapsed
+
+    def _finish(self) -> Optional[str]:
+        profile = self._profile
+        self._profile = None
+        self.remaining = 0
+        if profile is None or self._captured_steps == 0:
+            return None
+
+        stats = pstats.Stats(profile)
+        by_module: Dict[str, float] = defaultdict(float)
+        by_function: Dict[str, float] = defaultdict(float)
+        for (filename, line, function), (_, _, self_time, _, _) in stats.stats.items():  # type: ignore
+            module = _module_name(filename)
+            if module is None:
+                continue
+            by_module[module] += self_time
+            by_function[f"{module}.{function}:{line}"] += self_time
+
+        top_modules = sorted(by_module.items(), key=lambda item: item[1], reverse=True)
+        top_functions = sorted(by_function.items(), key=lambda item: item[1], reverse=True)
+        self.hotspots = top_functions[:self.top_n]
+
+        os.makedirs(self.report_dir, exist_ok=True)
+        path = os.path.join(self.report_dir, f"step_profile_{time.strftime('%Y%m%d-%H%M%S')}.txt")
+        with open(path, "w") as report:
+            report.write(self._format_report(stats, top_modules, top_functions))
+        # Raw profile for tools such as snakeviz
+        stats.dump_stats(os.path.splitext(path)[0] + ".prof")
+
+        self.last_report_path = path
+        print(f"Wrote step profile to {path}")
+        return path
+
+    def _format_report(
+            self,
+            stats: pstats.Stats,
+            top_modules: List[Tuple[str, float]],
+            top_functions: List[Tuple[str, float]]
+    ) -> str:
+        histogram = self._capture_histogram
+        lines = [
+            "CityViz simulation step profile",
+            f"Steps profiled: {self._captured_steps}",
+            f"Total step time: {histogram.total:.1f} ms",
+            f"Mean: {histogram.mean():.2f} ms, p50 <= {histogram.percentile(50):g} ms, "
+            f"p95 <= {histogram.percentile(95):g} ms, max: {histogram.max:.2f} ms",
+            "",
+            "Step latency",
+            *histogram.format(),
+            "",
+            "Self time by talktown module",
+            *(f"{seconds * 1000:>10.2f} ms  {name}" for name, seconds in top_modules[:20]),
+            "",
+            "Self time by talktown function",
+            *(f"{seconds * 1000:>10.2f} ms  {name}" for name, seconds in top_functions[:30]),
+            "",
+            "Full profile (cumulative time)",
+        ]
+        stream = io.StringIO()
+        stats.stream = stream  # type: ignore
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(40)
+        lines.append(stream.getvalue())
+        return "\n".join(lines)
@@ -0,0 +1,274 @@
+import json
+import socket
+import struct
+import sys
+import zlib
+from typing import Any, Dict, List, Optional, Tuple
+
+from cityviz.world_state import WorldState, apply_delta, diff_states
+
+DEFAULT_PORT = 7777
+
+# Frame header: payload length and flags
+_HEADER = struct.Struct(">IB")
+_FLAG_COMPRESSED = 1
+# Payloads smaller than this are not worth compressing
+_COMPRESS_THRESHOLD = 256
+# Largest accepted payload (bytes), both as received and after decompression
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+
+
+class ProtocolError(ValueError):
+    """Raised for received data that is not a valid message"""
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """Serialize a message into a length-prefixed frame"""
+    payload = json.dumps(message, separators=(",", ":")).encode("utf-8")
+    flags = 0
+    if len(payload) >= _COMPRESS_THRESHOLD:
+        payload = zlib.compress(payload)
+        flags |= _FLAG_COMPRESSED
+    return _HEADER.pack(len(payload), flags) + payload
+
+
+class FrameReader:
+    """Reassembles messages from a stream of received bytes"""
+
+    __slots__ = '_buffer',
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Add received bytes, returning all messages completed by them
+
+        Raises:
+            ProtocolError - if a frame is over MAX_FRAME_BYTES or is not a valid message
+        """
+        self._buffer.extend(data)
+        messages = []
+        while len(self._buffer) >= _HEADER.size:
+            length, flags = _HEADER.unpack_from(self._buffer)
+            if length > MAX_FRAME_BYTES:
+                raise ProtocolError(f"Frame of {length} bytes is over the limit of {MAX_FRAME_BYTES}")
+            end = _HEADER.size + length
+            if len(self._buffer) < end:
+                break
+            payload = bytes(self._buffer[_HEADER.size:end])
+            del self._buffer[:end]
+            messages.append(_decode_payload(payload, flags))
+        return messages
+
+
+def _decode_payload(payload: bytes, flags: int) -> Dict[str, Any]:
+    if flags & _FLAG_COMPRESSED:
+        decompressor = zlib.decompressobj()
+        try:
+            payload = decompressor.decompress(payload, MAX_FRAME_BYTES)
+        except zlib.error as error:
+            raise ProtocolError(f"Frame does not decompress ({error})") from error
+        if decompressor.unconsumed_tail:
+            raise ProtocolError(f"Frame decompresses to over {MAX_FRAME_BYTES} bytes")
+        if not decompressor.eof:
+            raise ProtocolError("Frame is truncated")
+    try:
+        message = json.loads(payload)
+    except (ValueError, RecursionError) as error:
+        raise ProtocolError(f"Frame is not valid JSON ({error})") from error
+    if not isinstance(message, dict):
+        raise ProtocolError("Frame is not a JSON object")
+    return message
+
+
+class _Viewer:
+    """A connected viewer and the bytes still waiting to be sent to it"""
+
+    __slots__ = 'socket', 'outbox'
+
+    def __init__(self, sock: socket.socket) -> None:
+        self.socket = sock
+        self.outbox = bytearray()
+
+
+class SimServer:
+    """
+    Publishes world states to any number of viewers over TCP
+
+    Each viewer receives a keyframe of the latest state when it
+    connects and then one delta per published step. A delta only
+    lists changed cells, so its size follows the size of the change
+    rather than the map size.
+
+    Sockets never block the simulation. Bytes a viewer cannot take
+    yet wait in its outbox and are retried on the next publish. A
+    viewer whose outbox grows over max_pending_bytes has stalled and
+    is dropped, as are viewers whose connection fails.
+    """
+
+    def __init__(
+            self,
+            host: str = "127.0.0.1",
+            port: int = DEFAULT_PORT,
+            max_pending_bytes: int = 4 * 1024 * 1024
+    ) -> None:
+        self.max_pending_bytes = max_pending_bytes
+        self.tick = 0
+        self.bytes_sent = 0
+        self.last_frame_size = 0
+        self._listener = socket.create_server((host, port))
+        self._listener.setblocking(False)
+        self._viewers: List[_Viewer] = []
+        self._state: Optional[WorldState] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self._listener.getsockname()[:2]
+
+    @property
+    def viewer_count(self) -> int:
+        return len(self._viewers)
+
+    @property
+    def pending_bytes(self) -> int:
+        """Bytes queued for viewers that have not been sent yet"""
+        return sum(len(viewer.outbox) for viewer in self._viewers)
+
+    def accept(self) -> int:
+        """Accept pending viewers, sending each the latest keyframe
+
+        Returns:
+            int - number of viewers accepted
+        """
+        accepted = 0
+        while True:
+            try:
+                client, _ = self._listener.accept()
+            except BlockingIOError:
+                return accepted
+            client.setblocking(False)
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            viewer = _Viewer(client)
+            self._viewers.append(viewer)
+            accepted += 1
+            if self._state is not None:
+                self._send(viewer, encode_message(self._keyframe()))
+
+    def publish(self, state: WorldState) -> None:
+        """Send the changes since the last published state to all viewers
+
+        The server keeps a reference to state, so it must not be
+        modified after it has been published.
+        """
+        self.accept()
+        self.tick += 1
+        delta = diff_states(self._state, state) if self._state is not None else None
+        self._state = state
+        if delta is None:
+            message = self._keyframe()
+        else:
+            message = {"type": "delta", "tick": self.tick, **delta}
+
+        frame = encode_message(message)
+        self.last_frame_size = len(frame)
+        for viewer in list(self._viewers):
+            self._send(viewer, frame)
+
+    def flush(self) -> None:
+        """Send as much of the queued bytes as the viewers will take"""
+        for viewer in list(self._viewers):
+            self._send(viewer, b"")
+
+    def close(self) -> None:
+        for viewer in self._viewers:
+            viewer.socket.close()
+        self._viewers.clear()
+        self._listener.close()
+
+    def _keyframe(self) -> Dict[str, Any]:
+        assert self._state is not None
+        return {"type": "keyframe", "tick": self.tick, **self._state.to_keyframe()}
+
+    def _send(self, viewer: _Viewer, frame: bytes) -> None:
+        outbox = viewer.outbox
+        outbox.extend(frame)
+        try:
+            while outbox:
+                sent = viewer.socket.send(outbox)
+                del outbox[:sent]
+                self.bytes_sent += sent
+        except (BlockingIOError, InterruptedError):
+            if len(outbox) > self.max_pending_bytes:
+                print(f"Dropping a viewer that is {len(outbox)} bytes behind", file=sys.stderr)
+                self._drop(viewer)
+        except OSError:
+            self._drop(viewer)
+
+    def _drop(self, viewer: _Viewer) -> None:
+        self._viewers.remove(viewer)
+        viewer.socket.close()
+
+
+class RemoteWorldClient:
+    """
+    Mirrors the world state published by a SimServer
+
+    poll() never blocks, so it can be called once per frame.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT, timeout: float = 5.0) -> None:
+        self.address = (host, port)
+        self.state: Optional[WorldState] = None
+        self.tick = 0
+        self.bytes_received = 0
+        self.connected = True
+        self._socket = socket.create_connection(self.address, timeout)
+        self._socket.setblocking(False)
+        self._reader = FrameReader()
+
+    def poll(self) -> bool:
+        """Apply all messages received since the last poll
+
+        Returns:
+            bool - True if the state changed
+        """
+        changed = False
+        while self.connected:
+            try:
+                data = self._socket.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                data = b""
+            if not data:
+                self.close()
+                break
+            self.bytes_received += len(data)
+            try:
+                for message in self._reader.feed(data):
+                    changed = self._apply(message) or changed
+            except ProtocolError as error:
+                # Reconnecting starts over from a keyframe
+                print(f"Closing the connection to {self.address[0]}:{self.address[1]}: {error}",
+                      file=sys.stderr)
+                self.close()
+        return changed
+
+    def close(self) -> None:
+        self.connected = False
+        self._socket.close()
+
+    def _apply(self, message: Dict[str, Any]) -> bool:
+        try:
+            self.tick = message["tick"]
+            if message["type"] == "keyframe":
+                self.state = WorldState.from_keyframe(message)
+                return True
+            if self.state is None:
+                # Deltas are meaningless before the first keyframe
+                return False
+            apply_delta(self.state, message)
+        except (KeyError, TypeError, ValueError) as error:
+            raise ProtocolError(f"Malformed message ({error!r})") from error
+        # Anything besides the type and tick is a change
+        return len(message) > 2
@@ -0,0 +1,70 @@
+from typing import List, Sequence, Tuple
+
+import pygame
+
+# Draw order of sprites that share an isometric row
+LAYER_GROUND = 0
+LAYER_ROAD = 1
+LAYER_WALKER = 2
+LAYER_BUILDING = 3
+LAYER_COUNT = 4
+
+# Depth for sprites drawn over the whole scene (e.g. the hover outline)
+OVERLAY_DEPTH = float('inf')
+
+
+def iso_depth(grid_x: float, grid_y: float, layer: int) -> float:
+    """Draw depth of a sprite at the given grid position
+
+    Sprites further down the screen (larger x + y) are drawn later, so tall
+    sprites are occluded by anything in front of them. Within the same row,
+    sprites are ordered by layer.
+    """
+    return (grid_x + grid_y) * LAYER_COUNT + layer
+
+
+class RenderQueue:
+    """
+    Collects sprites from every layer and draws them in depth order
+
+    The draw order from the previous frame is reused as the starting
+    point of the next sort. Python's sort is adaptive, so when the
+    scene has not changed much (the common case) sorting is close to
+    linear. Everything is drawn with a single Surface.blits call.
+    """
+
+    __slots__ = '_surfaces', '_positions', '_depths', '_order'
+
+    def __init__(self) -> None:
+        self._surfaces: List[pygame.Surface] = []
+        self._positions: List[Tuple[float, float]] = []
+        self._depths: List[float] = []
+        self._order: Sequence[int] = ()
+
+    def __len__(self) -> int:
+        return len(self._depths)
+
+    def submit(self, surface: pygame.Surface, position: Tuple[float, float], depth: float) -> None:
+        """Queue a surface to be drawn at the given position this frame"""
+        self._surfaces.append(surface)
+        self._positions.append(position)
+        self._depths.append(depth)
+
+    def sorted_order(self) -> Sequence[int]:
+        """Indices of the queued sprites sorted by depth"""
+        depths = self._depths
+        if len(self._order) == len(depths):
+            order = sorted(self._order, key=depths.__getitem__)
+        else:
+            order = sorted(range(len(depths)), key=depths.__getitem__)
+        self._order = order
+        return order
+
+    def flush(self, display: pygame.Surface) -> None:
+        """Draw all queued sprites in depth order and empty the queue"""
+        surfaces = self._surfaces
+        positions = self._positions
+        display.blits([(surfaces[i], positions[i]) for i in self.sorted_order()], doreturn=False)
+        surfaces.clear()
+        positions.clear()
+        self._depths.clear()
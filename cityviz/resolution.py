@@ -0,0 +1,77 @@
+from typing import Sequence
+
+
+class ResolutionScaler:
+    """
+    Picks the render scale of the world layers from measured frame times
+
+    Frame times are smoothed with an exponential moving average. When
+    the average goes over the frame budget the scale steps down. It
+    steps back up only when the frame, with its rendering cost grown
+    by the increase in pixel count, would still fit within the budget.
+    After every change the scaler waits a few frames so that the
+    average reflects the new scale.
+    """
+
+    __slots__ = ('frame_budget', 'scales', 'smoothing', 'headroom',
+                 'cooldown_frames', 'average_frame_time', '_index', '_cooldown')
+
+    def __init__(
+            self,
+            frame_budget: float,
+            scales: Sequence[float] = (1.0, 0.75, 0.5),
+            smoothing: float = 0.1,
+            headroom: float = 0.9,
+            cooldown_frames: int = 30
+    ) -> None:
+        """
+        Args:
+            frame_budget: (float) - target seconds per frame
+            scales: (Sequence[float]) - render scales from highest to lowest
+            smoothing: (float) - weight of the newest frame in the moving average
+            headroom: (float) - fraction of the budget a predicted frame must fit in to step up
+            cooldown_frames: (int) - frames to wait after changing scale
+        """
+        self.frame_budget = frame_budget
+        self.scales = tuple(scales)
+        self.smoothing = smoothing
+        self.headroom = headroom
+        self.cooldown_frames = cooldown_frames
+        self.average_frame_time = 0.0
+        self._index = 0
+        self._cooldown = cooldown_frames
+
+    @property
+    def scale(self) -> float:
+        return self.scales[self._index]
+
+    def record(self, frame_time: float) -> bool:
+        """Add a frame time measurement (seconds)
+
+        Returns:
+            bool - True if the render scale changed
+        """
+        if self.average_frame_time == 0.0:
+            self.average_frame_time = frame_time
+        else:
+            self.average_frame_time += (frame_time - self.average_frame_time) * self.smoothing
+
+        if self._cooldown > 0:
+            self._cooldown -= 1
+            return False
+
+        if self.average_frame_time > self.frame_budget:
+            if self._index < len(self.scales) - 1:
+                self._set_index(self._index + 1)
+                return True
+        elif self._index > 0:
+            pixel_growth = (self.scales[self._index - 1] / self.scale) ** 2
+            if self.average_frame_time * pixel_growth < self.frame_budget * self.headroom:
+                self._set_index(self._index - 1)
+                return True
+
+        return False
+
+    def _set_index(self, index: int) -> None:
+        self._index = index
+        self._cooldown = self.cooldown_frames
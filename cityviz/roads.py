@@ -0,0 +1,143 @@
+import heapq
+from array import array
+from collections import OrderedDict
+from typing import Collection, Dict, List, Optional, Tuple
+
+GridPos = Tuple[int, int]
+Path = Tuple[GridPos, ...]
+
+
+class RoadNetwork:
+    """
+    Compact graph of the road tiles in a city layout
+
+    Road tiles are graph nodes and orthogonally adjacent road tiles
+    are connected by edges. Adjacency is stored in CSR form (an offsets
+    array indexing into a flat neighbors array). The graph is only
+    rebuilt by sync() when the set of road tiles changes.
+    """
+
+    __slots__ = ('shape', 'nodes', 'version', 'path_cache_size', 'cache_hits',
+                 'cache_misses', '_node_index', '_offsets', '_neighbors', '_path_cache')
+
+    def __init__(self, path_cache_size: int = 4096) -> None:
+        self.shape: Tuple[int, int] = (0, 0)
+        self.nodes: Tuple[GridPos, ...] = ()
+        self.version = 0
+        self.path_cache_size = path_cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._node_index: Dict[GridPos, int] = {}
+        self._offsets = array('i', [0])
+        self._neighbors = array('i')
+        self._path_cache: 'OrderedDict[Tuple[int, int], Optional[Path]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    def __contains__(self, position: GridPos) -> bool:
+        return position in self._node_index
+
+    def sync(self, shape: Tuple[int, int], roads: Collection[GridPos]) -> bool:
+        """Rebuild the graph if the road tiles changed
+
+        Checking for a change costs time in the number of roads, not the map size.
+
+        Args:
+            shape: (Tuple[int, int]) - (rows, cols) of the layout
+            roads: (Collection[GridPos]) - positions of the road tiles
+
+        Returns:
+            bool - True if the graph was rebuilt
+        """
+        node_index = self._node_index
+        if shape == self.shape and len(roads) == len(node_index) \
+                and all(position in node_index for position in roads):
+            return False
+        self._build(shape, tuple(sorted(roads)))
+        return True
+
+    def neighbors(self, position: GridPos) -> List[GridPos]:
+        """Return the road tiles connected to the given road tile"""
+        index = self._node_index[position]
+        return [self.nodes[n] for n in self._neighbors[self._offsets[index]:self._offsets[index + 1]]]
+
+    def find_path(self, start: GridPos, goal: GridPos) -> Optional[Path]:
+        """Shortest path between two road tiles (inclusive) or None if unreachable
+
+        Results, including failed searches, are kept in a bounded LRU cache
+        that is cleared whenever the graph is rebuilt.
+        """
+        start_index = self._node_index.get(start)
+        goal_index = self._node_index.get(goal)
+        if start_index is None or goal_index is None:
+            return None
+
+        key = (start_index, goal_index)
+        if key in self._path_cache:
+            self.cache_hits += 1
+            self._path_cache.move_to_end(key)
+            return self._path_cache[key]
+
+        self.cache_misses += 1
+        path = self._a_star(start_index, goal_index)
+        self._path_cache[key] = path
+        if len(self._path_cache) > self.path_cache_size:
+            self._path_cache.popitem(last=False)
+        return path
+
+    def _build(self, shape: Tuple[int, int], nodes: Tuple[GridPos, ...]) -> None:
+        node_index = {pos: i for i, pos in enumerate(nodes)}
+        offsets = array('i', [0])
+        neighbors = array('i')
+        for x, y in nodes:
+            for adjacent in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+                n = node_index.get(adjacent)
+                if n is not None:
+                    neighbors.append(n)
+            offsets.append(len(neighbors))
+
+        self.shape = shape
+        self.nodes = nodes
+        self._node_index = node_index
+        self._offsets = offsets
+        self._neighbors = neighbors
+        self._path_cache.clear()
+        self.version += 1
+
+    def _a_star(self, start: int, goal: int) -> Optional[Path]:
+        nodes = self.nodes
+        offsets = self._offsets
+        neighbors = self._neighbors
+        goal_x, goal_y = nodes[goal]
+
+        came_from = array('i', [-1]) * len(nodes)
+        g_score: Dict[int, int] = {start: 0}
+        start_x, start_y = nodes[start]
+        # Entries are (f, -g, node) so ties prefer nodes closer to the goal
+        open_heap = [(abs(start_x - goal_x) + abs(start_y - goal_y), 0, start)]
+
+        while open_heap:
+            _, neg_g, current = heapq.heappop(open_heap)
+            if current == goal:
+                path = [nodes[current]]
+                while current != start:
+                    current = came_from[current]
+                    path.append(nodes[current])
+                path.reverse()
+                return tuple(path)
+
+            if -neg_g > g_score[current]:
+                # Stale heap entry
+                continue
+
+            next_g = 1 - neg_g
+            for n in neighbors[offsets[current]:offsets[current + 1]]:
+                if next_g < g_score.get(n, next_g + 1):
+                    g_score[n] = next_g
+                    came_from[n] = current
+                    n_x, n_y = nodes[n]
+                    heapq.heappush(
+                        open_heap, (next_g + abs(n_x - goal_x) + abs(n_y - goal_y), -next_g, n))
+
+        return None
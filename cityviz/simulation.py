@@ -0,0 +1,51 @@
+from typing import Dict
+
+from talktown.city.city import CityFactory
+from talktown.city.layout import RoadType
+from talktown.defaults.city_generation.legacy_layout import LegacyLayoutFactory
+from talktown.defaults.plugins.sample_theme import SAMPLE_THEME_PLUGIN
+from talktown.person.person import Person
+from talktown.place import Building
+from talktown.simulation.simulation import Simulation
+
+from cityviz.world_state import WorldState
+
+
+def create_simulation(city_name: str = "Squaresville") -> Simulation:
+    """Create the talktown simulation used by the game and the headless runner"""
+    return Simulation(
+        SAMPLE_THEME_PLUGIN,
+        city_name,
+        CityFactory(LegacyLayoutFactory()))
+
+
+def entity_counts(sim: Simulation) -> Dict[str, int]:
+    """Number of entities in the simulation's world, in total and by kind"""
+    counts = {
+        "characters": len(sim.world.get_component(Person)),
+        "buildings": len(sim.world.get_component(Building)),
+    }
+    # esper keeps every live entity in this dict
+    entities = getattr(sim.world, "_entities", None)
+    if entities is not None:
+        counts["entities"] = len(entities)
+    return counts
+
+
+def snapshot_world(sim: Simulation) -> WorldState:
+    """Capture the roads, buildings and population drawn on the map"""
+    layout = sim.get_city().layout
+    rows, cols = layout.shape
+    road_grid = layout.road_grid
+    lot_grid = layout.lot_grid
+    roads = {}
+    buildings = {}
+    for x in range(rows):
+        for y in range(cols):
+            road_type = road_grid[x, y]
+            if road_type != RoadType.EMPTY:
+                roads[x, y] = road_type.name
+            lot = lot_grid[x, y]
+            if lot and lot.building:
+                buildings[x, y] = sim.world.component_for_entity(lot.building, Building).building_style
+    return WorldState((rows, cols), roads, buildings, len(sim.world.get_component(Person)))
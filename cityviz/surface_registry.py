@@ -0,0 +1,241 @@
+import json
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple, Union
+
+import pygame
+
+# Eviction priorities of cached surfaces. Lower priorities are evicted first.
+PRIORITY_LOW = 0
+PRIORITY_NORMAL = 1
+PRIORITY_HIGH = 2
+
+CachedSurfaces = Union[pygame.Surface, Sequence[pygame.Surface]]
+
+# Stands in for "no key", since None is a valid cache key
+_NO_KEY = object()
+
+
+def surface_bytes(surfaces: CachedSurfaces) -> int:
+    """Bytes of pixel data held by a surface (or a sequence of surfaces)"""
+    if isinstance(surfaces, pygame.Surface):
+        return surfaces.get_pitch() * surfaces.get_height()
+    return sum(surface.get_pitch() * surface.get_height() for surface in surfaces)
+
+
+class SurfaceCache:
+    """
+    Least recently used cache of surfaces whose memory is accounted by a SurfaceRegistry
+
+    Cached surfaces must be cheap to create again, since the registry
+    may evict them at any time to stay within its budget.
+    """
+
+    __slots__ = ('registry', 'owner', 'category', 'priority', 'bytes',
+                 'hits', 'misses', '_entries')
+
+    def __init__(
+            self,
+            registry: 'SurfaceRegistry',
+            owner: str,
+            category: str,
+            priority: int = PRIORITY_NORMAL
+    ) -> None:
+        self.registry = registry
+        self.owner = owner
+        self.category = category
+        self.priority = priority
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # key -> (surfaces, bytes, registry clock of the last use)
+        self._entries: 'OrderedDict[Hashable, Tuple[CachedSurfaces, int, int]]' = OrderedDict()
+        registry.register_cache(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[CachedSurfaces]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries[key] = (entry[0], entry[1], self.registry.tick())
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, surfaces: CachedSurfaces) -> CachedSurfaces:
+        """Cache surfaces under key, evicting older surfaces if over budget"""
+        self.discard(key)
+        size = surface_bytes(surfaces)
+        self._entries[key] = (surfaces, size, self.registry.tick())
+        self.bytes += size
+        self.registry.cached_bytes += size
+        self.registry.enforce_budget(protect=(self, key))
+        return surfaces
+
+    def discard(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[1]
+            self.registry.cached_bytes -= entry[1]
+
+    def clear(self) -> None:
+        self.registry.cached_bytes -= self.bytes
+        self.bytes = 0
+        self._entries.clear()
+
+    def oldest_use(self) -> Optional[int]:
+        """Registry clock of the least recently used entry"""
+        for _, _, last_used in self._entries.values():
+            return last_used
+        return None
+
+    def evict_oldest(self, protect: Hashable = _NO_KEY) -> int:
+        """Drop the least recently used entry (other than protect), returning the bytes freed"""
+        for key in self._entries:
+            if key != protect:
+                size = self._entries[key][1]
+                self.discard(key)
+                return size
+        return 0
+
+
+class SurfaceRegistry:
+    """
+    Accounts the memory of surfaces by owner and category
+
+    Surfaces that are always needed (loaded images, display buffers,
+    backgrounds) are tracked and never evicted. Surfaces that can be
+    rebuilt live in SurfaceCaches. When the total goes over the budget,
+    entries are evicted from the lowest priority caches first, least
+    recently used first, until the total fits again or only tracked
+    surfaces are left.
+    """
+
+    def __init__(self, budget_bytes: Optional[int] = None) -> None:
+        self.budget_bytes = budget_bytes
+        self.tracked_bytes = 0
+        self.cached_bytes = 0
+        self.evictions = 0
+        self.evicted_bytes = 0
+        self._caches: List[SurfaceCache] = []
+        # id(surface) -> (surface, owner, category, bytes)
+        self._tracked: Dict[int, Tuple[pygame.Surface, str, str, int]] = {}
+        self._clock = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self.tracked_bytes + self.cached_bytes
+
+    def tick(self) -> int:
+        self._clock += 1
+        return self._clock
+
+    def track(self, owner: str, category: str, surface: pygame.Surface) -> pygame.Surface:
+        """Account a surface that is kept alive by its owner until untracked"""
+        self.untrack(surface)
+        size = surface_bytes(surface)
+        self._tracked[id(surface)] = (surface, owner, category, size)
+        self.tracked_bytes += size
+        self.enforce_budget()
+        return surface
+
+    def untrack(self, surface: pygame.Surface) -> None:
+        entry = self._tracked.pop(id(surface), None)
+        if entry is not None:
+            self.tracked_bytes -= entry[3]
+
+    def register_cache(self, cache: SurfaceCache) -> None:
+        self._caches.append(cache)
+
+    def release(self, owner: str) -> None:
+        """Forget all surfaces and caches of an owner that is going away"""
+        for surface, surface_owner, _, _ in list(self._tracked.values()):
+            if surface_owner == owner:
+                self.untrack(surface)
+        for cache in [cache for cache in self._caches if cache.owner == owner]:
+            cache.clear()
+            self._caches.remove(cache)
+
+    def enforce_budget(self, protect: Optional[Tuple[SurfaceCache, Hashable]] = None) -> None:
+        """Evict cached surfaces until the total fits the budget
+
+        Args:
+            protect: (Tuple[SurfaceCache, Hashable]) - cache entry that must
+                not be evicted (e.g. one that was just added and is about to be drawn)
+        """
+        if self.budget_bytes is None:
+            return
+        while self.total_bytes > self.budget_bytes:
+            victim = None
+            for cache in self._caches:
+                evictable = len(cache)
+                if protect is not None and protect[0] is cache and protect[1] in cache:
+                    evictable -= 1
+                if evictable and (victim is None or (cache.priority, cache.oldest_use())
+                                  < (victim.priority, victim.oldest_use())):
+                    victim = cache
+            if victim is None:
+                return
+            protected_key = protect[1] if protect is not None and protect[0] is victim else _NO_KEY
+            self.evicted_bytes += victim.evict_oldest(protected_key)
+            self.evictions += 1
+
+    def usage(self) -> Dict[str, Dict[str, Dict[str, int]]]:
+        """Bytes and number of surfaces per owner and category"""
+        usage: Dict[str, Dict[str, Dict[str, int]]] = {}
+
+        def add(owner: str, category: str, size: int, count: int) -> None:
+            entry = usage.setdefault(owner, {}).setdefault(category, {"bytes": 0, "surfaces": 0})
+            entry["bytes"] += size
+            entry["surfaces"] += count
+
+        for _, owner, category, size in self._tracked.values():
+            add(owner, category, size, 1)
+        for cache in self._caches:
+            if cache:
+                add(cache.owner, cache.category, cache.bytes, len(cache))
+        return usage
+
+    def dump(self) -> Dict[str, Any]:
+        """Machine-readable snapshot of the accounting as a JSON-compatible dict"""
+        return {
+            "budget_bytes": self.budget_bytes,
+            "total_bytes": self.total_bytes,
+            "tracked_bytes": self.tracked_bytes,
+            "cached_bytes": self.cached_bytes,
+            "evictions": self.evictions,
+            "evicted_bytes": self.evicted_bytes,
+            "owners": self.usage(),
+            "caches": [
+                {
+                    "owner": cache.owner,
+                    "category": cache.category,
+                    "priority": cache.priority,
+                    "entries": len(cache),
+                    "bytes": cache.bytes,
+                    "hits": cache.hits,
+                    "misses": cache.misses,
+                }
+                for cache in self._caches
+            ],
+        }
+
+    def write_dump(self, path: str) -> None:
+        with open(path, "w") as dump_file:
+            json.dump(self.dump(), dump_file, indent=2)
+
+    def summary(self) -> str:
+        """One line description for the debug overlay"""
+        total = f"Surfaces: {self.total_bytes / 2 ** 20:.1f}"
+        if self.budget_bytes is not None:
+            total += f"/{self.budget_bytes / 2 ** 20:.0f}"
+        return f"{total} MB, {self.evictions} evicted"
+
+
+# Registry shared by the game's loaders, modes and renderers
+default_registry = SurfaceRegistry()
@@ -1,4 +1,5 @@
-from typing import Tuple, TypedDict
+import math
+from typing import Iterator, Tuple, TypedDict
 
 import pygame
 
@@ -94,3 +95,40 @@ def mouse_to_grid(x: int, y: int, scroll: pygame.math.Vector2, tile_size: int =
     grid_x = int(cart_x // tile_size)
     grid_y = int(cart_y // tile_size)
     return grid_x, grid_y
+
+
+def tiles_in_bounds(
+        bounds: Tuple[float, float, float, float],
+        shape: Tuple[int, int],
+        tile_size: int = 64
+) -> Iterator[Tuple[int, int, int, int]]:
+    """Find the tiles whose render position lies strictly inside the given bounds
+
+    Only tiles inside the bounds are visited, so the cost follows the
+    size of the bounds (e.g. the screen) rather than the map size.
+
+    Args:
+        bounds: (Tuple[float, float, float, float]) - (left, top, right, bottom) in world space
+        shape: (Tuple[int, int]) - (rows, cols) of the map
+        tile_size: (int) - size (length & width) of square world tile in cartesian space
+
+    Returns
+        Iterator[Tuple[int, int, int, int]] - (grid_x, grid_y, render_x, render_y) of each tile
+    """
+    left, top, right, bottom = bounds
+    rows, cols = shape
+    # The render position of (x, y) is ((x - y - 1) * tile_size, (x + y) * tile_size / 2),
+    # so the diagonal x + y gives the row of a tile on screen and x - y its column
+    first_diagonal = max(0, math.floor(top / (tile_size / 2)) + 1)
+    last_diagonal = min(rows + cols - 2, math.ceil(bottom / (tile_size / 2)) - 1)
+    first_column = math.floor(left / tile_size) + 2
+    last_column = math.ceil(right / tile_size)
+    for diagonal in range(first_diagonal, last_diagonal + 1):
+        render_y = round(diagonal * tile_size * 0.5)
+        # Keep the tiles on the map: 0 <= x < rows and 0 <= y < cols
+        start = max(first_column, -diagonal, diagonal - 2 * (cols - 1))
+        stop = min(last_column, diagonal, 2 * (rows - 1) - diagonal)
+        # x - y and x + y are both even or both odd
+        start += (start - diagonal) % 2
+        for column in range(start, stop + 1, 2):
+            yield (column + diagonal) // 2, (diagonal - column) // 2, (column - 1) * tile_size, render_y
@@ -0,0 +1,166 @@
+import math
+import random
+import time
+from typing import List, Optional, Sequence, Tuple
+
+import pygame
+
+from cityviz.asset_loader import scale_surface
+from cityviz.constants import TILE_SIZE
+from cityviz.render_queue import LAYER_WALKER, RenderQueue, iso_depth
+from cityviz.roads import GridPos, RoadNetwork
+from cityviz.surface_registry import PRIORITY_LOW, SurfaceCache, SurfaceRegistry, default_registry
+
+WALKER_COLORS = (
+    (214, 69, 65),
+    (65, 131, 215),
+    (240, 196, 25),
+    (142, 68, 173),
+    (39, 174, 96),
+)
+
+
+class Walker:
+    """A character sprite moving along a path of road tiles"""
+
+    __slots__ = 'path', 'progress', 'sprite'
+
+    def __init__(self, path: Sequence[GridPos], sprite: int) -> None:
+        self.path = path
+        # Number of tiles travelled along the path
+        self.progress = 0.0
+        self.sprite = sprite
+
+    @property
+    def arrived(self) -> bool:
+        return self.progress >= len(self.path) - 1
+
+
+class WalkerRenderer:
+    """
+    Animates character sprites along shortest paths in a RoadNetwork
+
+    Each walker travels to a random road tile, then picks another
+    destination. Path queries are limited to a per-frame time budget so
+    that cache misses never stall a frame.
+    """
+
+    def __init__(
+            self,
+            network: RoadNetwork,
+            speed: float = 1.5,
+            path_budget_ms: float = 2.0,
+            tile_size: int = TILE_SIZE,
+            owner: str = "walkers",
+            registry: Optional[SurfaceRegistry] = None
+    ) -> None:
+        self.network = network
+        # Tiles travelled per second
+        self.speed = speed
+        self.path_budget_ms = path_budget_ms
+        self.tile_size = tile_size
+        self.walkers: List[Walker] = []
+        # Sprite memory is accounted to owner in the surface registry
+        registry = registry if registry is not None else default_registry
+        self.sprites = [registry.track(owner, "walker sprites", self._create_sprite(color))
+                        for color in WALKER_COLORS]
+        self._scaled_sprites = SurfaceCache(registry, owner, "walker sprites", PRIORITY_LOW)
+        self._network_version = -1
+        self._rng = random.Random()
+
+    def __len__(self) -> int:
+        return len(self.walkers)
+
+    def set_population(self, count: int) -> None:
+        """Add or remove walkers so that there are exactly count of them"""
+        if self._network_version != self.network.version:
+            # Old paths may run over removed roads
+            self.walkers.clear()
+            self._network_version = self.network.version
+
+        if not self.network.nodes:
+            self.walkers.clear()
+            return
+
+        if count < len(self.walkers):
+            del self.walkers[count:]
+
+        while len(self.walkers) < count:
+            start = self._rng.choice(self.network.nodes)
+            self.walkers.append(Walker((start,), self._rng.randrange(len(self.sprites))))
+
+    def update(self, delta_time: float) -> None:
+        """Move walkers and give new paths to those that arrived"""
+        distance = self.speed * delta_time
+        nodes = self.network.nodes
+        deadline = time.perf_counter() + self.path_budget_ms / 1000.0
+        out_of_time = False
+        for walker in self.walkers:
+            if not walker.arrived:
+                walker.progress += distance
+                continue
+
+            # Walkers left waiting get a path on a later frame
+            if out_of_time or time.perf_counter() >= deadline:
+                out_of_time = True
+                continue
+
+            path = self.network.find_path(walker.path[-1], self._rng.choice(nodes))
+            if path and len(path) > 1:
+                walker.path = path
+                walker.progress = 0.0
+
+    def submit(
+            self,
+            queue: RenderQueue,
+            scroll: pygame.math.Vector2,
+            view_size: Tuple[int, int],
+            scale: float = 1.0
+    ) -> None:
+        """Queue all visible walkers for drawing"""
+        if scale == 1.0:
+            sprites = self.sprites
+        else:
+            sprites = self._scaled_sprites.get(scale)
+            if sprites is None:
+                sprites = self._scaled_sprites.put(
+                    scale, [scale_surface(sprite, scale) for sprite in self.sprites])
+        tile_size = self.tile_size * scale
+        half_tile = tile_size * 0.5
+        sprite_w, sprite_h = sprites[0].get_size()
+        # Offsets that place the sprite's feet at its isometric position
+        offset_x = round(scroll.x * scale) - sprite_w * 0.5
+        offset_y = round(scroll.y * scale) - sprite_h
+        max_x, max_y = view_size
+
+        for walker in self.walkers:
+            x, y = self._grid_position(walker)
+            screen_x = (x - y) * tile_size + offset_x
+            screen_y = (x + y) * half_tile + offset_y
+            if -sprite_w < screen_x < max_x and -sprite_h < screen_y < max_y:
+                # Walkers are drawn over a tile as soon as they step onto it
+                queue.submit(
+                    sprites[walker.sprite],
+                    (screen_x, screen_y),
+                    iso_depth(math.ceil(x + y - 1.0), 0, LAYER_WALKER))
+
+    @staticmethod
+    def _grid_position(walker: Walker) -> Tuple[float, float]:
+        """Fractional grid position of the walker (tile centres at +0.5)"""
+        path = walker.path
+        last = len(path) - 1
+        if walker.progress >= last:
+            x, y = path[last]
+            return x + 0.5, y + 0.5
+        index = int(walker.progress)
+        fraction = walker.progress - index
+        x0, y0 = path[index]
+        x1, y1 = path[index + 1]
+        return x0 + (x1 - x0) * fraction + 0.5, y0 + (y1 - y0) * fraction + 0.5
+
+    @staticmethod
+    def _create_sprite(color: Tuple[int, int, int]) -> pygame.Surface:
+        sprite = pygame.Surface((8, 16), pygame.SRCALPHA)
+        pygame.draw.ellipse(sprite, color, pygame.Rect(0, 6, 8, 10))
+        pygame.draw.circle(sprite, (241, 194, 125), (4, 4), 4)
+        return sprite
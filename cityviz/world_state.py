@@ -0,0 +1,101 @@
+from typing import Any, Dict, Optional, Tuple
+
+GridPos = Tuple[int, int]
+
+
+class WorldState:
+    """
+    The parts of a city that are drawn on the map
+
+    Roads map tiles to talktown RoadType names (empty tiles are left
+    out) and buildings map tiles to building styles. Both are sparse,
+    so comparing two states costs time in the number of roads and
+    buildings, not the map size.
+    """
+
+    __slots__ = 'shape', 'roads', 'buildings', 'population'
+
+    def __init__(
+            self,
+            shape: Tuple[int, int],
+            roads: Optional[Dict[GridPos, str]] = None,
+            buildings: Optional[Dict[GridPos, str]] = None,
+            population: int = 0
+    ) -> None:
+        self.shape = shape
+        self.roads: Dict[GridPos, str] = roads if roads is not None else {}
+        self.buildings: Dict[GridPos, str] = buildings if buildings is not None else {}
+        self.population = population
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, WorldState):
+            return NotImplemented
+        return (self.shape == other.shape
+                and self.roads == other.roads
+                and self.buildings == other.buildings
+                and self.population == other.population)
+
+    def copy(self) -> 'WorldState':
+        return WorldState(self.shape, dict(self.roads), dict(self.buildings), self.population)
+
+    def to_keyframe(self) -> Dict[str, Any]:
+        """Full description of the state as a JSON-compatible dict"""
+        return {
+            "shape": list(self.shape),
+            "roads": [[x, y, road] for (x, y), road in self.roads.items()],
+            "buildings": [[x, y, style] for (x, y), style in self.buildings.items()],
+            "population": self.population,
+        }
+
+    @staticmethod
+    def from_keyframe(keyframe: Dict[str, Any]) -> 'WorldState':
+        # Numbers are converted so that malformed input fails here rather than while drawing
+        return WorldState(
+            (int(keyframe["shape"][0]), int(keyframe["shape"][1])),
+            {(int(x), int(y)): road for x, y, road in keyframe["roads"]},
+            {(int(x), int(y)): style for x, y, style in keyframe["buildings"]},
+            int(keyframe["population"]))
+
+
+def _diff_cells(old: Dict[GridPos, str], new: Dict[GridPos, str]) -> list:
+    if old == new:
+        # Comparing whole dicts is much faster than comparing cell by cell
+        return []
+    changes = [[x, y, value] for (x, y), value in new.items() if old.get((x, y)) != value]
+    changes.extend([x, y, None] for (x, y) in old.keys() - new.keys())
+    return changes
+
+
+def diff_states(old: WorldState, new: WorldState) -> Optional[Dict[str, Any]]:
+    """Changes that turn old into new as a JSON-compatible dict
+
+    Only changed cells are listed, with None marking a removed road or
+    building. Returns None when the map shapes differ, in which case a
+    keyframe has to be sent instead.
+    """
+    if old.shape != new.shape:
+        return None
+
+    delta: Dict[str, Any] = {}
+    roads = _diff_cells(old.roads, new.roads)
+    if roads:
+        delta["roads"] = roads
+    buildings = _diff_cells(old.buildings, new.buildings)
+    if buildings:
+        delta["buildings"] = buildings
+    if old.population != new.population:
+        delta["population"] = new.population
+    return delta
+
+
+def apply_delta(state: WorldState, delta: Dict[str, Any]) -> None:
+    """Apply a delta produced by diff_states to the state in place"""
+    for cells, changes in ((state.roads, delta.get("roads", ())),
+                           (state.buildings, delta.get("buildings", ()))):
+        for x, y, value in changes:
+            if value is None:
+                cells.pop((int(x), int(y)), None)
+            else:
+                cells[int(x), int(y)] = value
+    if "population" in delta:
+        state.population = int(delta["population"])
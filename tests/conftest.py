@@ -0,0 +1,23 @@
+import pytest
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("perf", "performance regression tests")
+    group.addoption(
+        "--perf", action="store_true",
+        help="run the performance regression tests")
+    group.addoption(
+        "--perf-tolerance", type=float, default=None,
+        help="allowed slowdown relative to the stored baselines, e.g. 1.5 (default: from the baseline file)")
+    group.addoption(
+        "--perf-update", action="store_true",
+        help="run the performance tests and store their timings as the new baselines")
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--perf") or config.getoption("--perf-update"):
+        return
+    skip_perf = pytest.mark.skip(reason="performance test (run with --perf)")
+    for item in items:
+        if "perf" in item.keywords:
+            item.add_marker(skip_perf)
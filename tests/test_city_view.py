@@ -0,0 +1,80 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+# cityviz.mode imports the talktown simulation
+pytest.importorskip("talktown")
+import pygame_gui
+
+from cityviz.mode import CityViewMode
+from cityviz.world_state import WorldState
+
+SCREEN_SIZE = (640, 480)
+
+
+@pytest.fixture
+def view():
+    pygame.init()
+    view = CityViewMode(pygame_gui.UIManager(SCREEN_SIZE), SCREEN_SIZE)
+    yield view
+    view.deactivate()
+    pygame.quit()
+
+
+def _city() -> WorldState:
+    roads = {(x, 2): "STRAIGHT_EW" for x in range(8)}
+    buildings = {(x, 3): "house" for x in range(0, 8, 2)}
+    return WorldState((8, 8), roads, buildings, 3)
+
+
+def _cached_layout(view: CityViewMode):
+    return dict(view._road_tiles), dict(view._building_tiles), view.road_network.nodes
+
+
+def test_unchanged_state_is_not_applied(view):
+    view._apply_world_state(_city())
+    version = view.road_network.version
+    view.dirty = False
+
+    view._apply_world_state(_city())
+
+    assert not view.dirty
+    assert view.road_network.version == version
+
+
+def test_changes_are_applied_incrementally(view):
+    state = _city()
+    view._apply_world_state(state)
+    version = view.road_network.version
+
+    # The mode keeps its own copy, so a client may change its state in place
+    state.roads[3, 3] = "FOUR_WAY"
+    del state.roads[0, 2]
+    state.buildings[5, 5] = "Bar"
+    del state.buildings[0, 3]
+    view._apply_world_state(state)
+
+    fresh = CityViewMode(view.ui_manager, SCREEN_SIZE)
+    fresh._apply_world_state(state)
+    assert _cached_layout(view) == _cached_layout(fresh)
+    assert view.road_network.version == version + 1
+    assert "Bar" in view._building_images
+
+    # Buildings alone leave the road graph as it is
+    state.buildings[6, 6] = "house"
+    view._apply_world_state(state)
+    assert view._building_tiles[6, 6] == "house"
+    assert view.road_network.version == version + 1
+
+
+def test_resized_map_is_rebuilt(view):
+    view._apply_world_state(_city())
+
+    view._apply_world_state(WorldState((4, 4), {(0, 0): "FOUR_WAY"}))
+
+    assert view._layout_shape == (4, 4)
+    assert view._road_tiles == {(0, 0): "road_4way"}
+    assert view._building_tiles == {}
@@ -0,0 +1,136 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+# GameMode drives a talktown simulation, which these tests replace with a stub
+pytest.importorskip("talktown")
+import pygame_gui
+
+from cityviz import mode as mode_module
+from cityviz.constants import FAST_FORWARD_FRAME_BUDGET_MS
+from cityviz.world_state import WorldState
+
+SCREEN_SIZE = (640, 480)
+# Simulated duration of one step
+STEP_MS = 4
+
+
+class FakeClock:
+    """Stands in for the time module, advanced only by simulation steps"""
+
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def perf_counter(self) -> float:
+        return self.now
+
+
+class FakeSim:
+    def __init__(self, clock: FakeClock) -> None:
+        self.clock = clock
+        self.steps = 0
+
+    def step(self) -> None:
+        self.steps += 1
+        self.clock.now += STEP_MS / 1000.0
+
+
+@pytest.fixture
+def game(monkeypatch):
+    pygame.init()
+    clock = FakeClock()
+    sim = FakeSim(clock)
+    # Steps run by the simulation at each layout sync
+    synced_at = []
+
+    def snapshot_world(snapshot_sim):
+        synced_at.append(snapshot_sim.steps)
+        return WorldState((4, 4), population=snapshot_sim.steps)
+
+    monkeypatch.setattr(mode_module, "time", clock)
+    monkeypatch.setattr(mode_module, "create_simulation", lambda: sim)
+    monkeypatch.setattr(mode_module, "snapshot_world", snapshot_world)
+    game = mode_module.GameMode(pygame_gui.UIManager(SCREEN_SIZE), SCREEN_SIZE)
+    synced_at.clear()
+    yield game, sim, synced_at
+    game.deactivate()
+    pygame.quit()
+
+
+def test_fast_forward_batches_stop_at_frame_budget(game):
+    game, sim, synced_at = game
+    game.fast_forward(100)
+
+    game.update(1 / 60)
+
+    # The batch ends with the first step that reaches the budget
+    steps_per_batch = -(-FAST_FORWARD_FRAME_BUDGET_MS // STEP_MS)
+    assert sim.steps == steps_per_batch
+    assert game.fast_forward_remaining == 100 - steps_per_batch
+    assert game.fast_forwarding
+    # The map is not synced while fast-forwarding
+    assert synced_at == []
+
+    game.update(1 / 60)
+    assert sim.steps == 2 * steps_per_batch
+
+
+def test_fast_forward_counts_down_and_syncs_layout(game):
+    game, sim, synced_at = game
+    game.fast_forward(10)
+
+    remaining = [game.fast_forward_remaining]
+    while game.fast_forwarding and len(remaining) < 100:
+        game.update(1 / 60)
+        remaining.append(game.fast_forward_remaining)
+
+    assert remaining == sorted(remaining, reverse=True)
+    assert remaining[-1] == 0
+    assert sim.steps == 10
+    assert game.fast_forward_total == 0
+    assert synced_at == [10]
+
+    # Updates after finishing do not step the paused simulation
+    game.update(1 / 60)
+    assert sim.steps == 10
+
+
+def test_pause_keeps_steps_already_run(game):
+    game, sim, synced_at = game
+    game.fast_forward(100)
+    game.update(1 / 60)
+    steps_run = sim.steps
+
+    game.handle_event(pygame.event.Event(
+        pygame.USEREVENT,
+        user_type=pygame_gui.UI_BUTTON_PRESSED,
+        ui_element=game.ui_elements['pause-btn'],
+        ui_object_id='#pause-btn'))
+
+    assert not game.fast_forwarding
+    assert not game.sim_running
+    assert sim.steps == steps_run
+    assert synced_at == [steps_run]
+
+    game.update(1 / 60)
+    assert sim.steps == steps_run
+
+
+def test_cancel_fast_forward_keeps_steps_already_run(game):
+    game, sim, synced_at = game
+    game.fast_forward(100)
+    game.update(1 / 60)
+    game.update(1 / 60)
+    steps_run = sim.steps
+
+    game.cancel_fast_forward()
+
+    assert game.fast_forward_remaining == 0
+    assert sim.steps == steps_run
+    assert synced_at == [steps_run]
+    # Cancelling again does nothing
+    game.cancel_fast_forward()
+    assert synced_at == [steps_run]
@@ -0,0 +1,30 @@
+import io
+import json
+
+from cityviz.metrics import MetricsWriter, memory_usage_mb
+
+
+def test_metrics_writer_buffers_lines():
+    stream = io.StringIO()
+    writer = MetricsWriter(stream, buffer_lines=3)
+
+    writer.write({"step": 1})
+    writer.write({"step": 2})
+    assert stream.getvalue() == ""
+
+    writer.write({"step": 3})
+    assert writer.records_written == 3
+
+    with writer:
+        writer.write({"step": 4, "step_ms": 1.5})
+
+    lines = stream.getvalue().splitlines()
+    assert [json.loads(line) for line in lines] == [
+        {"step": 1}, {"step": 2}, {"step": 3}, {"step": 4, "step_ms": 1.5}
+    ]
+    assert stream.getvalue().endswith("\n")
+
+
+def test_memory_usage_mb():
+    usage = memory_usage_mb()
+    assert usage is None or usage > 0
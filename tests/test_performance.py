@@ -0,0 +1,236 @@
+"""
+Performance regression tests for the coordinate transforms and map drawing
+
+Run with `pytest --perf`. Timings are divided by the time of a fixed
+reference workload measured in the same session, so the baselines in
+perf_baselines.json carry over between machines reasonably well. A test
+fails when a case is slower than its baseline times the tolerance
+(stored in the baseline file, or set with --perf-tolerance). After an
+intended change in performance, refresh the baselines with
+`pytest --perf-update`.
+"""
+import json
+import os
+import timeit
+from pathlib import Path
+from typing import Callable, Dict
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+import pytest
+
+from cityviz.utils import grid_to_world, mouse_to_grid, to_isometric
+
+pytestmark = pytest.mark.perf
+
+BASELINE_PATH = Path(__file__).parent / "perf_baselines.json"
+GRID_SIZES = (10, 50, 100, 250, 500)
+SCREEN_SIZE = (1024, 768)
+EXPORTS_DIR = Path(__file__).parent.parent / "cityviz" / "assets" / "graphics" / "exports"
+
+# Minimum duration of one timing sample, and samples taken per case
+MIN_SAMPLE_TIME = 0.02
+REPEAT = 5
+
+
+def best_time(func: Callable[[], object]) -> float:
+    """Fastest time (seconds) of a single call to func"""
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < MIN_SAMPLE_TIME:
+        number *= 2
+    return min(timer.repeat(REPEAT, number)) / number
+
+
+def reference_workload() -> int:
+    """Fixed amount of pure Python work, used as the unit of time"""
+    total = 0
+    for i in range(10000):
+        total += (i * 7) % 13
+    return total
+
+
+class Baselines:
+    """Stored relative timings, checked against (or replaced by) this run"""
+
+    def __init__(self, config: pytest.Config) -> None:
+        data = json.loads(BASELINE_PATH.read_text())
+        self.tolerance: float = config.getoption("--perf-tolerance") or data["tolerance"]
+        self.baselines: Dict[str, float] = data["baselines"]
+        self.update = config.getoption("--perf-update")
+
+    def check(self, name: str, func: Callable[[], object]) -> None:
+        # The unit is measured next to every case so that changes in clock
+        # speed during the session affect both timings alike
+        relative = best_time(func) / best_time(reference_workload)
+        if self.update:
+            self.baselines[name] = float(f"{relative:.4g}")
+            return
+        if name not in self.baselines:
+            pytest.fail(f"No baseline for {name}, run pytest --perf-update to record one")
+        limit = self.baselines[name] * self.tolerance
+        assert relative <= limit, \
+            f"{name} took {relative:.3f} units (baseline {self.baselines[name]:.3f}, limit {limit:.3f})"
+
+    def save(self) -> None:
+        data = {"tolerance": self.tolerance, "baselines": dict(sorted(self.baselines.items()))}
+        BASELINE_PATH.write_text(json.dumps(data, indent=2) + "\n")
+
+
+@pytest.fixture(scope="module")
+def baselines(request):
+    baselines = Baselines(request.config)
+    yield baselines
+    if baselines.update:
+        baselines.save()
+
+
+def grid(size: int):
+    return [(x, y) for x in range(size) for y in range(size)]
+
+
+@pytest.mark.parametrize("size", GRID_SIZES)
+def test_to_isometric(baselines, size):
+    positions = grid(size)
+
+    def run():
+        for position in positions:
+            to_isometric(position)
+
+    baselines.check(f"to_isometric[{size}x{size}]", run)
+
+
+@pytest.mark.parametrize("size", GRID_SIZES)
+def test_grid_to_world(baselines, size):
+    positions = grid(size)
+
+    def run():
+        for position in positions:
+            grid_to_world(position)
+
+    baselines.check(f"grid_to_world[{size}x{size}]", run)
+
+
+@pytest.mark.parametrize("size", GRID_SIZES)
+def test_mouse_to_grid(baselines, size):
+    scroll = pygame.math.Vector2(SCREEN_SIZE[0] / 2, 0)
+    # Center of every tile on screen
+    points = [(x + 64 + scroll.x, y + 32 + scroll.y)
+              for x, y in (grid_to_world(position)["render_pos"] for position in grid(size))]
+
+    def run():
+        for x, y in points:
+            mouse_to_grid(x, y, scroll)
+
+    baselines.check(f"mouse_to_grid[{size}x{size}]", run)
+
+
+@pytest.fixture(scope="module")
+def image_loader():
+    pygame.init()
+    pygame.display.set_mode(SCREEN_SIZE)
+    from cityviz.asset_loader import ImageAssetConfig, ImageAssetLoader
+
+    images = {
+        "grass": "grass_tile", "road_ns": "road_NS", "road_ew": "road_EW",
+        "road_4way": "road_4way", "house": "house", "Bar": "bar",
+    }
+    loader = ImageAssetLoader(
+        [ImageAssetConfig(name, str(EXPORTS_DIR / f"{file}.png")) for name, file in images.items()])
+    loader.load()
+    yield loader
+    pygame.quit()
+
+
+def city_state(size: int, population: int = 0):
+    """A size x size city with a road every fifth row and column"""
+    from cityviz.world_state import WorldState
+
+    roads = {}
+    buildings = {}
+    for x in range(size):
+        for y in range(size):
+            if x % 5 == 0 and y % 5 == 0:
+                roads[x, y] = "FOUR_WAY"
+            elif x % 5 == 0:
+                roads[x, y] = "STRAIGHT_NS"
+            elif y % 5 == 0:
+                roads[x, y] = "STRAIGHT_EW"
+            elif (x + y) % 3 == 0:
+                buildings[x, y] = "Bar" if x % 2 else "house"
+    return WorldState((size, size), roads, buildings, population)
+
+
+def city_view(size: int, population: int = 0):
+    """A map view of the city_state() of the given size"""
+    # The map code is shared by GameMode and ViewerMode through CityViewMode.
+    # Using it directly leaves the simulation out of the measurements.
+    pytest.importorskip("talktown")
+    import pygame_gui
+    from cityviz.constants import MAX_WALKERS
+    from cityviz.mode import CityViewMode
+
+    mode = CityViewMode(pygame_gui.UIManager(SCREEN_SIZE), SCREEN_SIZE)
+    mode._apply_world_state(city_state(size, min(population, MAX_WALKERS)))
+    # Start at the top corner of the map, like the game
+    mode.camera.scroll.x = SCREEN_SIZE[0] / 2
+    mode.selected_tile = pygame.math.Vector2(1, 1)
+    return mode
+
+
+@pytest.mark.parametrize("size", GRID_SIZES)
+def test_draw_map(baselines, image_loader, size):
+    mode = city_view(size)
+    display = pygame.Surface(SCREEN_SIZE)
+    view_size = display.get_size()
+
+    def queue(queue_fn):
+        def run():
+            queue_fn(image_loader, view_size, 1.0)
+            # Drop the queued sprites without drawing them
+            mode.render_queue = type(mode.render_queue)()
+        return run
+
+    baselines.check(f"queue_ground[{size}x{size}]", queue(mode._queue_ground))
+    baselines.check(f"queue_roads[{size}x{size}]", queue(mode._queue_roads))
+    baselines.check(f"queue_buildings[{size}x{size}]", queue(mode._queue_buildings))
+    baselines.check(f"draw[{size}x{size}]", lambda: mode.draw(display, image_loader))
+
+
+@pytest.mark.parametrize("size", (250, 500))
+def test_walkers(baselines, image_loader, size):
+    from cityviz.constants import MAX_WALKERS
+
+    mode = city_view(size, population=MAX_WALKERS)
+    walkers = mode.walkers
+    walkers._rng.seed(0)
+    display = pygame.Surface(SCREEN_SIZE)
+    # Let every walker get its first path before timing
+    while any(len(walker.path) < 2 for walker in walkers.walkers):
+        walkers.update(0.0)
+
+    def frame():
+        walkers.update(1 / 60)
+        walkers.submit(mode.render_queue, mode.camera.scroll, SCREEN_SIZE)
+        mode.render_queue.flush(display)
+
+    baselines.check(f"walkers[{size}x{size}]", frame)
+
+
+@pytest.mark.parametrize("size", (250, 500))
+def test_played_frame(baselines, image_loader, size):
+    """A frame of a running game whose city did not change during the step"""
+    from cityviz.constants import MAX_WALKERS
+
+    mode = city_view(size, population=MAX_WALKERS)
+    state = city_state(size, MAX_WALKERS)
+    display = pygame.Surface(SCREEN_SIZE)
+
+    def frame():
+        # Every step hands the map a new snapshot of the simulation
+        mode._apply_world_state(state.copy())
+        mode.walkers.update(1 / 60)
+        mode.draw(display, image_loader)
+
+    baselines.check(f"played_frame[{size}x{size}]", frame)
@@ -0,0 +1,52 @@
+import os
+
+from cityviz.profiling import LatencyHistogram, StepProfiler
+
+
+def test_latency_histogram():
+    histogram = LatencyHistogram((1, 2, 4))
+    for ms in (0.5, 0.9, 1.5, 3, 10):
+        histogram.record(ms / 1000)
+
+    assert histogram.counts == [2, 1, 1, 1]
+    assert len(histogram) == 5
+    assert histogram.percentile(40) == 1
+    assert histogram.percentile(60) == 2
+    assert histogram.percentile(100) == 10
+    assert round(histogram.max, 6) == 10
+    assert len(histogram.format()) == 4
+
+
+def test_step_profiler_writes_report(tmp_path):
+    profiler = StepProfiler(steps=3, report_dir=str(tmp_path))
+    calls = []
+
+    profiler.step(lambda: calls.append(1))
+    assert not profiler.active
+
+    profiler.start()
+    for _ in range(3):
+        profiler.step(lambda: calls.append(1))
+
+    assert not profiler.active
+    assert len(calls) == 4
+    assert len(profiler.histogram) == 4
+    assert os.path.exists(profiler.last_report_path)
+    with open(profiler.last_report_path) as report:
+        assert "Steps profiled: 3" in report.read()
+
+
+def test_step_profiler_stop_early(tmp_path):
+    profiler = StepProfiler(steps=10, report_dir=str(tmp_path))
+
+    # Nothing to report when no steps were captured
+    profiler.toggle()
+    assert profiler.active
+    profiler.toggle()
+    assert not profiler.active
+    assert profiler.last_report_path is None
+
+    profiler.start()
+    profiler.step(lambda: None)
+    assert profiler.stop() == profiler.last_report_path
+    assert not profiler.active
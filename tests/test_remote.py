@@ -0,0 +1,214 @@
+import os
+import socket
+import struct
+import time
+import zlib
+
+import pytest
+
+from cityviz import remote
+from cityviz.remote import FrameReader, ProtocolError, RemoteWorldClient, SimServer, encode_message
+from cityviz.world_state import WorldState, apply_delta, diff_states
+
+
+def _city(size: int, population: int = 0) -> WorldState:
+    roads = {(x, 5): "STRAIGHT_EW" for x in range(size)}
+    buildings = {(x, 6): "house" for x in range(0, size, 2)}
+    return WorldState((size, size), roads, buildings, population)
+
+
+def _poll_until(client: RemoteWorldClient, tick: int) -> None:
+    deadline = time.perf_counter() + 5.0
+    while client.tick < tick and time.perf_counter() < deadline:
+        client.poll()
+        time.sleep(0.001)
+
+
+def test_diff_and_apply_delta():
+    old = _city(20)
+    new = old.copy()
+    new.roads[3, 3] = "FOUR_WAY"
+    del new.buildings[0, 6]
+    new.population = 12
+
+    delta = diff_states(old, new)
+    assert delta == {"roads": [[3, 3, "FOUR_WAY"]], "buildings": [[0, 6, None]], "population": 12}
+    apply_delta(old, delta)
+    assert old == new
+
+    assert diff_states(new, new.copy()) == {}
+    assert diff_states(new, _city(30)) is None
+
+
+def test_keyframe_round_trip():
+    state = _city(10, population=4)
+    assert WorldState.from_keyframe(state.to_keyframe()) == state
+
+
+def test_frame_reader_handles_partial_frames():
+    small = {"type": "delta", "tick": 1}
+    large = {"type": "keyframe", "tick": 2, **_city(50).to_keyframe()}
+    data = encode_message(small) + encode_message(large)
+    # The large message is compressed
+    assert len(data) < len(str(large))
+
+    reader = FrameReader()
+    messages = []
+    for i in range(0, len(data), 7):
+        messages.extend(reader.feed(data[i:i + 7]))
+    assert messages == [small, large]
+
+
+def _frame(payload: bytes, compressed: bool = False) -> bytes:
+    return struct.pack(">IB", len(payload), int(compressed)) + payload
+
+
+@pytest.mark.parametrize("data", [
+    _frame(b"not json"),
+    _frame(b"[1, 2]"),
+    _frame(b"not zlib", compressed=True),
+    # Truncated compressed stream
+    _frame(zlib.compress(b'{"type": "delta", "tick": 1}')[:-6], compressed=True),
+], ids=["json", "not-an-object", "zlib", "truncated"])
+def test_frame_reader_rejects_malformed_frames(data):
+    with pytest.raises(ProtocolError):
+        FrameReader().feed(data)
+
+
+def test_frame_reader_limits_frame_size(monkeypatch):
+    monkeypatch.setattr(remote, "MAX_FRAME_BYTES", 1024)
+
+    # Rejected from the header, without waiting for the payload
+    with pytest.raises(ProtocolError):
+        FrameReader().feed(struct.pack(">IB", 1025, 0))
+
+    # Small when compressed, too large when decompressed
+    bomb = _frame(zlib.compress(b'{"padding": "' + b"0" * 4096 + b'"}'), compressed=True)
+    assert len(bomb) < 1024
+    with pytest.raises(ProtocolError):
+        FrameReader().feed(bomb)
+
+
+@pytest.mark.parametrize("message", [
+    {"type": "keyframe"},
+    {"type": "keyframe", "tick": 1, "shape": ["a", 2], "roads": [], "buildings": [], "population": 0},
+    {"type": "keyframe", "tick": 1, "shape": [2, 2], "roads": [[0, 0]], "buildings": [], "population": 0},
+], ids=["missing-fields", "bad-shape", "bad-cell"])
+def test_client_closes_on_malformed_message(message):
+    listener = socket.create_server(("127.0.0.1", 0))
+    try:
+        client = RemoteWorldClient(*listener.getsockname()[:2])
+        sock, _ = listener.accept()
+        sock.sendall(encode_message(message))
+        deadline = time.perf_counter() + 5.0
+        while client.connected and time.perf_counter() < deadline:
+            client.poll()
+            time.sleep(0.001)
+
+        assert not client.connected
+        assert client.state is None
+        sock.close()
+    finally:
+        listener.close()
+
+
+def test_server_sends_keyframe_then_deltas():
+    server = SimServer("127.0.0.1", 0)
+    try:
+        state = _city(100)
+        server.publish(state)
+        keyframe_size = server.last_frame_size
+
+        client = RemoteWorldClient(*server.address)
+        server.accept()
+        _poll_until(client, 1)
+        assert client.state == state
+
+        state = state.copy()
+        state.buildings[50, 50] = "Bar"
+        server.publish(state)
+        assert server.last_frame_size < keyframe_size / 4
+        _poll_until(client, 2)
+        assert client.state == state
+
+        # A map of a different size is sent as a keyframe
+        state = _city(20)
+        server.publish(state)
+        _poll_until(client, 3)
+        assert client.state == state
+        assert client.bytes_received == server.bytes_sent
+        client.close()
+    finally:
+        server.close()
+
+
+def _read_messages(sock: socket.socket, reader: FrameReader, count: int) -> list:
+    messages = []
+    sock.settimeout(5.0)
+    while len(messages) < count:
+        messages.extend(reader.feed(sock.recv(65536)))
+    return messages
+
+
+def test_viewer_joining_mid_stream_gets_keyframe():
+    server = SimServer("127.0.0.1", 0)
+    try:
+        state = _city(50)
+        server.publish(state)
+        first = socket.create_connection(server.address)
+        first_reader = FrameReader()
+        server.accept()
+
+        state = state.copy()
+        state.roads[1, 1] = "FOUR_WAY"
+        server.publish(state)
+        second = socket.create_connection(server.address)
+        second_reader = FrameReader()
+        server.accept()
+        assert server.viewer_count == 2
+
+        state = state.copy()
+        state.population = 3
+        server.publish(state)
+
+        first_messages = _read_messages(first, first_reader, 3)
+        second_messages = _read_messages(second, second_reader, 2)
+        assert [m["type"] for m in first_messages] == ["keyframe", "delta", "delta"]
+        # The late viewer starts from a keyframe of the state at the time it joined
+        assert [m["type"] for m in second_messages] == ["keyframe", "delta"]
+        assert second_messages[0]["tick"] == 2
+        assert WorldState.from_keyframe(second_messages[0]).roads[1, 1] == "FOUR_WAY"
+        assert first_messages[2] == second_messages[1] == {"type": "delta", "tick": 3, "population": 3}
+        first.close()
+        second.close()
+    finally:
+        server.close()
+
+
+def test_stalled_viewer_is_dropped_without_blocking():
+    server = SimServer("127.0.0.1", 0, max_pending_bytes=64 * 1024)
+    try:
+        stalled = socket.socket()
+        stalled.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+        stalled.connect(server.address)
+        client = RemoteWorldClient(*server.address)
+        server.accept()
+
+        start = time.perf_counter()
+        tick = 0
+        while server.viewer_count == 2 and tick < 500:
+            # Random styles so that the frames do not compress away
+            state = WorldState((1000, 1000), {}, {(i, 0): os.urandom(8).hex() for i in range(1000)})
+            server.publish(state)
+            tick += 1
+            client.poll()
+        assert time.perf_counter() - start < 5.0
+
+        # The viewer that keeps reading is unaffected
+        assert server.viewer_count == 1
+        _poll_until(client, tick)
+        assert client.state == state
+        stalled.close()
+        client.close()
+    finally:
+        server.close()
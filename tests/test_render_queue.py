@@ -0,0 +1,46 @@
+import pygame
+
+from cityviz.render_queue import (LAYER_BUILDING, LAYER_GROUND, OVERLAY_DEPTH,
+                                  RenderQueue, iso_depth)
+
+
+def solid(color):
+    surface = pygame.Surface((4, 4))
+    surface.fill(color)
+    return surface
+
+
+def test_iso_depth():
+    # Rows further down the screen are drawn later
+    assert iso_depth(1, 0, LAYER_GROUND) > iso_depth(0, 0, LAYER_BUILDING)
+    assert iso_depth(1, 1, LAYER_GROUND) > iso_depth(1, 0, LAYER_BUILDING)
+    # Within a row, layers are ordered
+    assert iso_depth(1, 0, LAYER_BUILDING) > iso_depth(0, 1, LAYER_GROUND)
+
+
+def test_flush_draws_in_depth_order():
+    display = pygame.Surface((4, 4))
+    queue = RenderQueue()
+    queue.submit(solid((255, 0, 0)), (0, 0), OVERLAY_DEPTH)
+    queue.submit(solid((0, 255, 0)), (0, 0), 5)
+    queue.submit(solid((0, 0, 255)), (0, 0), 1)
+
+    queue.flush(display)
+
+    assert display.get_at((0, 0)) == (255, 0, 0, 255)
+    assert len(queue) == 0
+
+
+def test_sorted_order_reuses_previous_order():
+    queue = RenderQueue()
+    sprite = solid((0, 0, 0))
+
+    for depth in (3, 1, 2):
+        queue.submit(sprite, (0, 0), depth)
+    assert list(queue.sorted_order()) == [1, 2, 0]
+    queue.flush(pygame.Surface((4, 4)))
+
+    # Same number of sprites with changed depths is still fully sorted
+    for depth in (1, 3, 2):
+        queue.submit(sprite, (0, 0), depth)
+    assert list(queue.sorted_order()) == [0, 2, 1]
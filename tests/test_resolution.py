@@ -0,0 +1,35 @@
+from cityviz.resolution import ResolutionScaler
+
+
+def test_steps_down_when_over_budget():
+    scaler = ResolutionScaler(1 / 60, (1.0, 0.75, 0.5), cooldown_frames=0)
+
+    assert scaler.record(1 / 30)
+    assert scaler.scale == 0.75
+    assert scaler.record(1 / 30)
+    assert scaler.scale == 0.5
+    # Already at the lowest scale
+    assert not scaler.record(1 / 30)
+
+
+def test_steps_up_with_headroom():
+    scaler = ResolutionScaler(1 / 60, (1.0, 0.5), smoothing=1.0, cooldown_frames=0)
+    scaler.record(1 / 30)
+    assert scaler.scale == 0.5
+
+    # 4x the pixels at 1/120s would not fit in the budget
+    assert not scaler.record(1 / 120)
+    assert scaler.record(1 / 500)
+    assert scaler.scale == 1.0
+
+
+def test_cooldown_after_change():
+    scaler = ResolutionScaler(1 / 60, (1.0, 0.75, 0.5), cooldown_frames=3)
+
+    for _ in range(3):
+        assert not scaler.record(1 / 30)
+    assert scaler.record(1 / 30)
+    for _ in range(3):
+        assert not scaler.record(1 / 30)
+    assert scaler.record(1 / 30)
+    assert scaler.scale == 0.5
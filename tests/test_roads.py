@@ -0,0 +1,82 @@
+from cityviz.roads import RoadNetwork
+
+
+def make_network(rows):
+    """Build a network from strings where '#' marks a road tile"""
+    roads = {(x, y) for y, row in enumerate(rows) for x, c in enumerate(row) if c == '#'}
+    network = RoadNetwork(path_cache_size=2)
+    network.sync((len(rows[0]), len(rows)), roads)
+    return network
+
+
+def test_sync_builds_graph():
+    network = make_network([
+        "###",
+        "#..",
+        "###",
+    ])
+
+    assert len(network) == 7
+    assert sorted(network.neighbors((0, 1))) == [(0, 0), (0, 2)]
+    assert sorted(network.neighbors((1, 0))) == [(0, 0), (2, 0)]
+    assert network.neighbors((2, 2)) == [(1, 2)]
+
+
+def test_sync_only_rebuilds_on_change():
+    roads = {(0, 0), (1, 0)}
+    network = RoadNetwork()
+
+    assert network.sync((2, 2), roads)
+    assert not network.sync((2, 2), roads)
+    assert network.version == 1
+
+    roads.add((1, 1))
+    assert network.sync((2, 2), roads)
+    assert network.version == 2
+
+    # Same number of roads, in different places
+    roads.remove((0, 0))
+    roads.add((0, 1))
+    assert network.sync((2, 2), roads)
+    assert network.version == 3
+
+
+def test_find_path():
+    network = make_network([
+        "#####",
+        "#...#",
+        "#.###",
+        "#.#..",
+        "###..",
+    ])
+
+    path = network.find_path((0, 0), (4, 2))
+
+    assert path == ((0, 0), (1, 0), (2, 0), (3, 0), (4, 0), (4, 1), (4, 2))
+    assert network.find_path((0, 0), (3, 3)) is None
+    assert network.find_path((0, 0), (0, 0)) == ((0, 0),)
+
+
+def test_find_path_unreachable():
+    network = make_network([
+        "##.##",
+    ])
+
+    assert network.find_path((0, 0), (4, 0)) is None
+
+
+def test_path_cache():
+    network = make_network([
+        "####",
+    ])
+
+    network.find_path((0, 0), (3, 0))
+    network.find_path((0, 0), (3, 0))
+    assert network.cache_hits == 1
+    assert network.cache_misses == 1
+
+    # Cache holds two paths, so the least recently used one is evicted
+    network.find_path((0, 0), (2, 0))
+    network.find_path((1, 0), (3, 0))
+    network.find_path((0, 0), (3, 0))
+    assert network.cache_misses == 4
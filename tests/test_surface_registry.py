@@ -0,0 +1,83 @@
+import json
+
+import pygame
+
+from cityviz.surface_registry import (PRIORITY_HIGH, PRIORITY_LOW, SurfaceCache,
+                                      SurfaceRegistry, surface_bytes)
+
+# 32x32 pixels at 4 bytes each
+SURFACE_SIZE = 32 * 32 * 4
+
+
+def surface():
+    return pygame.Surface((32, 32), pygame.SRCALPHA)
+
+
+def test_accounts_bytes_by_owner_and_category():
+    registry = SurfaceRegistry()
+    registry.track("game", "display", surface())
+    cache = SurfaceCache(registry, "assets", "scaled images")
+    cache.put("a", surface())
+    cache.put("b", [surface(), surface()])
+
+    assert surface_bytes(surface()) == SURFACE_SIZE
+    assert registry.tracked_bytes == SURFACE_SIZE
+    assert registry.cached_bytes == 3 * SURFACE_SIZE
+    assert registry.usage() == {
+        "game": {"display": {"bytes": SURFACE_SIZE, "surfaces": 1}},
+        "assets": {"scaled images": {"bytes": 3 * SURFACE_SIZE, "surfaces": 2}},
+    }
+
+    cache.discard("b")
+    assert registry.total_bytes == 2 * SURFACE_SIZE
+    dump = json.loads(json.dumps(registry.dump()))
+    assert dump["caches"][0]["entries"] == 1
+
+
+def test_evicts_low_priority_and_least_recent_first():
+    registry = SurfaceRegistry(budget_bytes=4 * SURFACE_SIZE)
+    registry.track("game", "display", surface())
+    low = SurfaceCache(registry, "assets", "scaled images", PRIORITY_LOW)
+    high = SurfaceCache(registry, "game", "scaled display", PRIORITY_HIGH)
+    high.put(0.5, surface())
+    low.put("a", surface())
+    low.put("b", surface())
+    assert registry.evictions == 0
+
+    # "a" was used more recently than "b"
+    assert low.get("a") is not None
+    low.put("c", surface())
+    assert "b" not in low
+    assert "a" in low and "c" in low and 0.5 in high
+    assert registry.total_bytes <= registry.budget_bytes
+
+    # Higher priority caches lose surfaces only when nothing cheaper is left
+    registry.budget_bytes = 2 * SURFACE_SIZE
+    registry.enforce_budget()
+    assert len(low) == 0 and 0.5 in high
+    assert registry.evictions == 3
+
+
+def test_never_evicts_the_surface_being_added():
+    registry = SurfaceRegistry(budget_bytes=SURFACE_SIZE)
+    cache = SurfaceCache(registry, "walkers", "walker sprites")
+    cache.put(1, surface())
+    cache.put(2, surface())
+    assert 2 in cache and 1 not in cache
+
+    registry.track("game", "display", surface())
+    # Tracked surfaces may exceed the budget once every cache is empty
+    assert 2 not in cache
+    assert registry.total_bytes == SURFACE_SIZE
+
+
+def test_release_forgets_owner():
+    registry = SurfaceRegistry()
+    registry.track("Game", "background", surface())
+    SurfaceCache(registry, "Game", "overlay").put(0.5, surface())
+    registry.track("assets", "images", surface())
+
+    registry.release("Game")
+    assert registry.total_bytes == SURFACE_SIZE
+    assert list(registry.usage()) == ["assets"]
+    assert registry.dump()["caches"] == []
@@ -1,4 +1,6 @@
-from cityviz.utils import to_isometric, grid_to_world
+import pygame
+
+from cityviz.utils import to_isometric, grid_to_world, mouse_to_grid, tiles_in_bounds
 
 
 def test_to_isometric():
@@ -57,33 +59,79 @@ def test_grid_to_world():
 
     expected_iso_polygons = [
         # Iso Poly for (0, 0)
-        ((0, 0), (32, 16), (0, 32), (-32, 16)),
+        ((0, 0), (64, 32), (0, 64), (-64, 32)),
         # Iso Poly for (1, 0)
-        ((64, 0), (128, 0), (128, 64), (64, 64)),
+        ((64, 32), (128, 64), (64, 96), (0, 64)),
         # Iso Poly for (2, 0)
-        ((128, 0), (192, 0), (192, 64), (128, 64)),
+        ((128, 64), (192, 96), (128, 128), (64, 96)),
         # Iso Poly for (0, 1)
-        ((0, 64), (64, 64), (64, 128), (0, 128)),
+        ((-64, 32), (0, 64), (-64, 96), (-128, 64)),
         # Iso Poly for (1, 1)
-        ((64, 64), (128, 64), (128, 128), (64, 128)),
+        ((0, 64), (64, 96), (0, 128), (-64, 96)),
         # Iso Poly for (2, 1)
-        ((128, 64), (192, 64), (192, 128), (128, 128)),
+        ((64, 96), (128, 128), (64, 160), (0, 128)),
         # Iso Poly for (0, 2)
-        ((0, 128), (64, 128), (64, 192), (0, 192)),
+        ((-128, 64), (-64, 96), (-128, 128), (-192, 96)),
         # Iso Poly for (1, 2)
-        ((64, 128), (128, 128), (128, 192), (64, 192)),
+        ((-64, 96), (0, 128), (-64, 160), (-128, 128)),
         # Iso Poly for (2, 2)
-        ((128, 128), (192, 128), (192, 192), (128, 192)),
+        ((0, 128), (64, 160), (0, 192), (-64, 160)),
     ]
 
-    assert expected_iso_polygons[0] == actual_iso_polygons[0]
+    assert expected_iso_polygons == actual_iso_polygons
 
     actual_render_positions = [res['render_pos'] for res in results]
 
     expected_render_positions = [
-        (-32, 0), (0, 0), (0, 0),
-        (-32, 0), (0, 0), (0, 0),
-        (-32, 0), (0, 0), (0, 0),
+        (-64, 0), (0, 32), (64, 64),
+        (-128, 32), (-64, 64), (0, 96),
+        (-192, 64), (-128, 96), (-64, 128),
     ]
 
-    assert expected_render_positions[0] == actual_render_positions[0]
+    assert expected_render_positions == actual_render_positions
+
+
+def _tile_contains(tile, x, y, tile_size=64):
+    """True if (x, y) is strictly inside the tile's isometric diamond"""
+    top_x, top_y = tile["iso_poly"][0]
+    return abs(x - top_x) / tile_size + abs(y - top_y - tile_size / 2) / (tile_size / 2) < 1
+
+
+def test_mouse_to_grid_inverts_grid_to_world():
+    scroll = pygame.math.Vector2(512, -96.5)
+    for x in range(500):
+        for y in range(500):
+            # Each tile owns its top vertex and the points just inside the other three
+            (top_x, top_y), (right_x, right_y), (bottom_x, bottom_y), (left_x, left_y) = \
+                grid_to_world((x, y))["iso_poly"]
+            assert mouse_to_grid(top_x + scroll.x, top_y + scroll.y, scroll) == (x, y)
+            assert mouse_to_grid(right_x - 2 + scroll.x, right_y + scroll.y, scroll) == (x, y)
+            assert mouse_to_grid(bottom_x + scroll.x, bottom_y - 1 + scroll.y, scroll) == (x, y)
+            assert mouse_to_grid(left_x + 2 + scroll.x, left_y + scroll.y, scroll) == (x, y)
+
+
+def test_mouse_to_grid_every_pixel():
+    scroll = pygame.math.Vector2(300, 17)
+    for grid_x in range(-2, 3):
+        for grid_y in range(-2, 3):
+            tile = grid_to_world((grid_x, grid_y))
+            render_x, render_y = tile["render_pos"]
+            for x in range(render_x, render_x + 128):
+                for y in range(render_y, render_y + 64):
+                    if _tile_contains(tile, x, y):
+                        assert mouse_to_grid(x + scroll.x, y + scroll.y, scroll) == (grid_x, grid_y)
+
+
+def test_tiles_in_bounds_matches_render_positions():
+    shape = (7, 5)
+    tiles = [(x, y, *grid_to_world((x, y))["render_pos"]) for x in range(shape[0]) for y in range(shape[1])]
+    for bounds in [(-1000, -1000, 1000, 1000), (-64, 0, 64, 96), (-200.5, 31, 130, 64.5), (0, 0, 0, 0)]:
+        left, top, right, bottom = bounds
+        expected = [tile for tile in tiles if left < tile[2] < right and top < tile[3] < bottom]
+
+        assert sorted(tiles_in_bounds(bounds, shape)) == sorted(expected)
+
+
+def test_tiles_in_bounds_only_visits_bounds():
+    # A screen sized area of a huge map
+    assert len(list(tiles_in_bounds((0, 0, 1024, 768), (10 ** 6, 10 ** 6)))) < 200